@@ -1,6 +1,8 @@
 from flask import Flask
+from framework.metrics import Metrics
 
 app = Flask(__name__)
+Metrics(app)
 
 @app.route('/')
 def health():
@@ -0,0 +1,72 @@
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+
+import main
+from framework.database import SessionLocal
+from framework.models import Base, MotivationalPhrase
+
+# Usage: PYTHONPATH=../../.. python benchmark.py [sizes] [requests]
+# e.g. python benchmark.py 10,1000,100000,10000000 2000
+SIZES = [int(size) for size in (sys.argv[1] if len(sys.argv) > 1 else "10,1000,100000").split(",")]
+REQUESTS = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+BATCH_SIZE = 50000
+
+
+def seed(engine, total):
+    with engine.begin() as conn:
+        for start in range(0, total, BATCH_SIZE):
+            stop = min(start + BATCH_SIZE, total)
+            conn.execute(
+                insert(MotivationalPhrase),
+                [{"phrase": f"Phrase number {i}"} for i in range(start, stop)],
+            )
+
+
+def measure(client):
+    timings = []
+    for _ in range(REQUESTS):
+        started = time.perf_counter()
+        response = client.get("/")
+        timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.99) - 1], timings[-1]
+
+
+def run(total):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'benchmark.db')}")
+        Base.metadata.create_all(engine)
+        seed(engine, total)
+        SessionLocal.configure(bind=engine)
+        main._phrase_range = None
+
+        client = main.app.test_client()
+        started = time.perf_counter()
+        client.get("/")
+        first = (time.perf_counter() - started) * 1000
+        cached = measure(client)
+        # A TTL of zero makes every request find the range expired, the worst
+        # case of what happens once per PHRASE_RANGE_TTL in production.
+        ttl, main.PHRASE_RANGE_TTL = main.PHRASE_RANGE_TTL, 0.0
+        try:
+            expired = measure(client)
+        finally:
+            main.PHRASE_RANGE_TTL = ttl
+        engine.dispose()
+
+    for label, (median, p99, worst) in (("cached", cached), ("expired", expired)):
+        print(
+            f"{total:>10} rows | {label:<7} | first {first:8.2f} ms | "
+            f"median {median:6.3f} ms | p99 {p99:6.3f} ms | max {worst:7.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    for size in SIZES:
+        run(size)
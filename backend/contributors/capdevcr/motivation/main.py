@@ -1,21 +1,71 @@
 from flask import Flask, jsonify
+from sqlalchemy import func, select
 import os
 import random
-import sys
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../framework')))
-from database import get_session
-from models import MotivationalPhrase
+import time
+from framework.database import get_session, init_app
+from framework.metrics import Metrics
+from framework.models import MotivationalPhrase
 
 app = Flask(__name__)
+init_app(app)
+Metrics(app)
+
+# Only the id range is kept in memory. A phrase is one index probe: pick a
+# random id in the range and take the first row at or after it, so latency
+# and memory don't depend on the table size. Gaps left by deleted rows make
+# the row right after a gap a little more likely, which is fine here.
+PHRASE_RANGE_TTL = float(os.environ.get("PHRASE_RANGE_TTL", "60"))
+
+_phrase_range = None
+_phrase_range_loaded_at = 0.0
+
+
+def load_phrase_range(session, force=False):
+    """`(min id, max id)` of the table, or None when it is empty.
+
+    Refreshing is a min/max over the primary key index, so a request that
+    finds it expired pays one cheap query instead of blocking the others.
+    """
+    global _phrase_range, _phrase_range_loaded_at
+    if force or _phrase_range is None or time.monotonic() - _phrase_range_loaded_at >= PHRASE_RANGE_TTL:
+        # Two subqueries: SQLite only answers a lone min() or max() from the index.
+        low, high = session.execute(select(
+            select(func.min(MotivationalPhrase.id)).scalar_subquery(),
+            select(func.max(MotivationalPhrase.id)).scalar_subquery(),
+        )).one()
+        _phrase_range = None if low is None else (low, high)
+        _phrase_range_loaded_at = time.monotonic()
+    return _phrase_range
+
+
+def _phrase_from(session, start):
+    return session.scalars(
+        select(MotivationalPhrase.phrase)
+        .where(MotivationalPhrase.id >= start)
+        .order_by(MotivationalPhrase.id)
+        .limit(1)
+    ).first()
+
+
+def pick_phrase(session):
+    bounds = load_phrase_range(session)
+    if bounds is None:
+        return None
+    phrase = _phrase_from(session, random.randint(*bounds))
+    if phrase is None:
+        # The rows at the top of the cached range were deleted, start over
+        # from the lowest id and refresh the range for the next requests.
+        load_phrase_range(session, force=True)
+        phrase = _phrase_from(session, bounds[0])
+    return phrase
+
 
 @app.route('/')
 def get_motivation():
-    session = get_session()
-    phrases = session.query(MotivationalPhrase).all()
-    session.close()
-    if not phrases:
+    phrase = pick_phrase(get_session())
+    if phrase is None:
         return jsonify({'error': 'No motivational phrases found.'}), 404
-    phrase = random.choice(phrases).phrase
     return jsonify({'phrase': phrase})
 
 if __name__ == '__main__':
@@ -0,0 +1,117 @@
+import hashlib
+import os
+import time
+from functools import wraps
+
+import jwt
+from flask import g, jsonify, request
+from framework.lru import LRUCache
+
+JWT_SECRET = os.environ.get("JWT_SECRET", "")
+if not JWT_SECRET:
+    # Never fall back to a shared default, anyone could sign tokens with it.
+    raise RuntimeError(
+        "JWT_SECRET is not set, generate one with "
+        "python -c 'import secrets; print(secrets.token_urlsafe(32))'"
+    )
+JWT_ALGORITHM = os.environ.get("JWT_ALGORITHM", "HS256")
+JWT_EXPIRES_IN = int(os.environ.get("JWT_EXPIRES_IN", "3600"))
+TOKEN_CACHE_SIZE = int(os.environ.get("TOKEN_CACHE_SIZE", "10000"))
+USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = float(os.environ.get("USER_CACHE_TTL", "300"))
+
+# sha256(token) -> verified claims, the raw token is never kept.
+_claims = LRUCache(TOKEN_CACHE_SIZE)
+# user id -> whatever the user loader returns (role, warehouse, store...)
+_users = LRUCache(USER_CACHE_SIZE)
+_user_loader = None
+
+
+def issue_token(subject, expires_in=JWT_EXPIRES_IN, **claims):
+    claims.update(sub=str(subject), exp=int(time.time()) + expires_in)
+    return jwt.encode(claims, JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+
+def verify_token(token):
+    """Decoded claims of `token`; raises `jwt.InvalidTokenError`.
+
+    A token is verified once and then served from cache until its `exp`.
+    """
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    entry = _claims.get(key)
+    if entry is not None:
+        claims = entry[0]
+        if claims.get("exp") is None or claims["exp"] > time.time():
+            return claims
+        raise jwt.ExpiredSignatureError("Signature has expired")
+    claims = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    _claims.set(key, claims)
+    return claims
+
+
+def user_loader(function):
+    """Register `function(user_id)` returning the user's role and assignments."""
+    global _user_loader
+    _user_loader = function
+    return function
+
+
+def get_user(user_id):
+    entry = _users.get(user_id)
+    if entry is not None and time.time() - entry[1] < USER_CACHE_TTL:
+        return entry[0]
+    user = _user_loader(user_id) if _user_loader else None
+    if user is not None:
+        _users.set(user_id, user)
+    return user
+
+
+def invalidate_user(user_id=None):
+    """Forget cached roles, call it when a user's role or assignment changes."""
+    if user_id is None:
+        _users.clear()
+    else:
+        _users.delete(user_id)
+
+
+def _error(message, status):
+    return jsonify({"success": False, "error": message}), status
+
+
+def login_required(roles=None):
+    """Require a valid Bearer token; the view gets `g.claims` and `g.user`."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                header = request.headers.get("Authorization", "")
+                scheme, _, token = header.partition(" ")
+                if scheme.lower() != "bearer" or not token:
+                    return _error("Missing token", 401)
+                try:
+                    g.claims = verify_token(token)
+                except jwt.InvalidTokenError as error:
+                    return _error(f"Invalid token: {error}", 401)
+                g.user = get_user(g.claims.get("sub"))
+                if g.user is None:
+                    return _error("Unknown user", 401)
+                if roles and g.user.get("role") not in roles:
+                    return _error("Forbidden", 403)
+            finally:
+                g.auth_ms = (time.perf_counter() - started) * 1000
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _server_timing(response):
+    auth_ms = g.get("auth_ms")
+    if auth_ms is not None:
+        response.headers.add("Server-Timing", f"auth;dur={auth_ms:.3f}")
+    return response
+
+
+def init_app(app):
+    app.after_request(_server_timing)
+    return app
@@ -0,0 +1,163 @@
+import numpy as np
+from sqlalchemy import text
+
+
+class ColumnTable:
+    """A table held as NumPy columns, categorical columns stored as int codes.
+
+    Group-by reductions use `np.bincount` over the codes, so every report over
+    the table is a single vectorized pass instead of a SQL query per request.
+    A NULL category gets code -1: it belongs to no group and is never counted.
+    """
+
+    def __init__(self, columns, categorical=()):
+        self.categories = {}
+        self.codes = {}
+        self.values = {}
+        lengths = set()
+        for name, data in columns.items():
+            if name in categorical:
+                data = np.asarray(data, dtype=object)
+                present = ~np.equal(data, None)
+                codes = np.full(len(data), -1, dtype=np.int64)
+                categories, codes[present] = np.unique(data[present].astype(str), return_inverse=True)
+                self.categories[name] = categories
+                self.codes[name] = codes
+                lengths.add(len(codes))
+            else:
+                self.values[name] = np.asarray(data)
+                lengths.add(len(self.values[name]))
+        if len(lengths) > 1:
+            raise ValueError("All columns must have the same length")
+        self._length = lengths.pop() if lengths else 0
+
+    @classmethod
+    def from_rows(cls, rows, names, categorical=()):
+        rows = list(rows)
+        columns = {name: [row[i] for row in rows] for i, name in enumerate(names)}
+        return cls(columns, categorical)
+
+    @classmethod
+    def from_query(cls, conn, statement, categorical=(), chunk_size=50000):
+        """Load the result of `statement` (SQL text or a select) column by column."""
+        if isinstance(statement, str):
+            statement = text(statement)
+        result = conn.execution_options(stream_results=True).execute(statement)
+        names = list(result.keys())
+        columns = {name: [] for name in names}
+        for chunk in result.partitions(chunk_size):
+            for i, name in enumerate(names):
+                columns[name].extend(row[i] for row in chunk)
+        return cls(columns, categorical)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, name):
+        if name in self.values:
+            return self.values[name]
+        # The appended None is what code -1 picks.
+        return np.append(self.categories[name].astype(object), None)[self.codes[name]]
+
+    def equals(self, name, value):
+        """Boolean mask of the rows where the categorical `name` is `value`."""
+        positions = np.flatnonzero(self.categories[name] == str(value))
+        if not len(positions):
+            return np.zeros(len(self), dtype=bool)
+        return self.codes[name] == positions[0]
+
+    def _group_keys(self, by):
+        """Flat group number of every row, the number of groups and the mask
+        of the rows that have every `by` category (no NULL)."""
+        key = np.zeros(len(self), dtype=np.int64)
+        present = np.ones(len(self), dtype=bool)
+        size = 1
+        for name in by:
+            key = key * len(self.categories[name]) + self.codes[name]
+            present &= self.codes[name] >= 0
+            size *= len(self.categories[name])
+        return key, size, present
+
+    def _label(self, by, flat):
+        parts = []
+        for name in reversed(by):
+            flat, code = divmod(flat, len(self.categories[name]))
+            parts.append(self.categories[name][code])
+        parts.reverse()
+        return parts[0] if len(parts) == 1 else tuple(parts)
+
+    def group_means(self, values, by, where=None):
+        """Mean of every column in `values` per group of the categorical `by`.
+
+        Returns `{value_column: {group: mean}}`; a group is the category for a
+        single `by` column and a tuple of categories otherwise. Empty groups
+        are left out.
+        """
+        if isinstance(by, str):
+            by = [by]
+        key, size, present = self._group_keys(by)
+        if where is not None:
+            key, present = key[where], present[where]
+        key = key[present]
+        counts = np.bincount(key, minlength=size)
+        groups = np.flatnonzero(counts)
+        labels = [self._label(by, int(flat)) for flat in groups]
+        result = {}
+        for name in values:
+            column = self.values[name] if where is None else self.values[name][where]
+            sums = np.bincount(key, weights=column[present], minlength=size)
+            means = sums[groups] / counts[groups]
+            result[name] = dict(zip(labels, means.tolist()))
+        return result
+
+    def mean(self, value, where=None):
+        column = self.values[value] if where is None else self.values[value][where]
+        return float(column.mean()) if len(column) else None
+
+    def _labels(self, keys, labels):
+        if labels is None:
+            return np.asarray(keys)
+        labels = {str(key): value for key, value in labels.items()}
+        return np.array([labels[str(key)] for key in keys], dtype=object)
+
+    def top_n(self, value, by, n, label, descending=True, labels=None):
+        """The `label` of the `n` rows with the highest `value` per group of `by`.
+
+        Pass a unique `label` column such as `person_id` with `labels`
+        (`{id: name}`) to get names back, two people sharing a name then stay
+        two rows. Ties are broken by the returned label, then by `label`. Rows
+        with a NULL `by` or `label` are left out.
+        """
+        rows = self.codes[by] >= 0
+        if label in self.codes:
+            rows &= self.codes[label] >= 0
+            keys = self.categories[label][self.codes[label][rows]]
+        else:
+            keys = self.values[label][rows]
+        order_value = -self.values[value][rows] if descending else self.values[value][rows]
+        groups = self.codes[by][rows]
+        shown = self._labels(keys, labels)
+        order = np.lexsort((keys, shown, order_value, groups))
+        sorted_groups = groups[order]
+        starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+        rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+        keep = order[rank < n]
+        result = {}
+        for group, name in zip(self.categories[by][groups[keep]], shown[keep].tolist()):
+            result.setdefault(str(group), []).append(name)
+        return result
+
+    def value_counts(self, name, labels=None):
+        """`(category, count)` pairs sorted by count desc, then category.
+
+        Counting is per category of `name`; with `labels` (`{category: label}`)
+        each pair carries the label instead, so count by an id column and map
+        the ids to names here.
+        """
+        categories = self.categories[name]
+        codes = self.codes[name]
+        counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+        shown = self._labels(categories, labels)
+        order = np.lexsort((categories, shown, -counts))
+        shown = shown.tolist()
+        return [(shown[i], int(counts[i])) for i in order if counts[i]]
@@ -1,17 +1,220 @@
-from models import Base
 import os
+import threading
+from contextlib import contextmanager
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import orm
+from sqlalchemy.exc import UnboundExecutionError
+from sqlalchemy.orm import scoped_session, sessionmaker
+from framework.settings import settings
 
-user = os.environ.get("POSTGRES_USER", "postgres")
-password = os.environ.get("POSTGRES_PASSWORD", "postgres")
-host = os.environ.get("POSTGRES_HOST", "localhost")
-port = os.environ.get("POSTGRES_PORT", "5432")
-db = os.environ.get("POSTGRES_DB", "postgres")
+DATABASE_URL = settings.database_url
+
+
+def engine_options(url):
+    options = {"pool_pre_ping": settings.db_pool_pre_ping}
+    if url.startswith("postgresql"):
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+        )
+        connect_args = {"prepare_threshold": settings.db_prepare_threshold}
+        if settings.db_statement_timeout_ms:
+            connect_args["options"] = f"-c statement_timeout={settings.db_statement_timeout_ms}"
+        options["connect_args"] = connect_args
+    return options
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """The framework engine, built on first use.
+
+    Importing this module only reads settings; the dialect and driver are
+    loaded by the first query, so tools that never touch the database (or
+    point it somewhere else) start faster.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_engine(settings.database_url, **engine_options(settings.database_url))
+    return _engine
+
+
+class LazySession(orm.Session):
+    """Session that binds to `get_engine()` unless it was given a bind."""
+
+    def get_bind(self, *args, **kwargs):
+        try:
+            return super().get_bind(*args, **kwargs)
+        except UnboundExecutionError:
+            return get_engine()
+
+
+SessionLocal = sessionmaker(class_=LazySession)
+Session = scoped_session(SessionLocal)
+
+
+def __getattr__(name):
+    # `from framework.database import engine` keeps working, it just builds
+    # the engine at that point instead of at import time.
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _reset_pool_after_fork():
+    # Drop the parent's pooled connections without closing the sockets the
+    # parent still owns, each worker then builds its own pool.
+    if _engine is not None:
+        _engine.dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_pool_after_fork)
 
-DATABASE_URL = f"postgresql+psycopg://{user}:{password}@{host}:{port}/{db}"
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine)
 
 def get_session():
-    return SessionLocal()
+    return Session()
+
+
+def flushed_tables(session, exclude=()):
+    """Names of the tables `session` is flushing, for `after_flush` listeners.
+
+    Tables named in `exclude` are left out, a listener skips the table it
+    writes to itself so its own bookkeeping doesn't trigger it again.
+    """
+    tables = set()
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(instance, "__table__", None)
+        if table is not None and table.name not in exclude:
+            tables.add(table.name)
+    return tables
+
+
+def stream_rows(conn, statement, batch_size=None):
+    """Yield the rows of `statement` without loading the whole result.
+
+    `conn` is a Connection or a Session. On Postgres the rows come from a
+    server-side (named) cursor, `batch_size` rows per round trip; the caller
+    must keep `conn` open until the generator is exhausted or closed.
+    """
+    batch_size = batch_size or settings.db_stream_batch_size
+    result = conn.execute(statement.execution_options(yield_per=batch_size))
+    try:
+        for partition in result.partitions():
+            yield from partition
+    finally:
+        result.close()
+
+
+@contextmanager
+def pipeline(conn):
+    """psycopg pipeline mode on `conn` for the duration of the block.
+
+    Statements are sent without waiting for each result, so N independent
+    queries cost about one round trip. A no-op on other databases.
+    """
+    if conn.dialect.name != "postgresql":
+        yield conn
+        return
+    with conn.connection.dbapi_connection.pipeline():
+        yield conn
+
+
+def _driver_statement(statement, dialect):
+    """SQL and parameters for the DBAPI cursor, as SQLAlchemy would send them.
+
+    Expanding parameters (`in_()`) are rendered in place and every value goes
+    through its type's bind processor (JSON, Enum, ...).
+    """
+    compiled = statement.compile(dialect=dialect)
+    state = compiled.construct_expanded_state()
+    # Same merge as DefaultExecutionContext: expanded names get their own entry.
+    processors = {**compiled._bind_processors, **state.processors}
+    parameters = {
+        name: processors[name](value) if name in processors else value
+        for name, value in state.parameters.items()
+    }
+    return state.statement, parameters
+
+
+def run_pipeline(conn, statements):
+    """Run independent `statements` in one pipeline, returns their rows in order.
+
+    Results are fetched only after every statement was sent, so don't use it
+    for statements that depend on each other's output.
+    """
+    if conn.dialect.name != "postgresql":
+        return [conn.execute(statement).all() for statement in statements]
+    dbapi_connection = conn.connection.dbapi_connection
+    cursors = []
+    with dbapi_connection.pipeline():
+        for statement in statements:
+            cursor = dbapi_connection.cursor()
+            cursor.execute(*_driver_statement(statement, conn.dialect))
+            cursors.append(cursor)
+    results = []
+    for cursor in cursors:
+        results.append(cursor.fetchall() if cursor.description else [])
+        cursor.close()
+    return results
+
+
+def async_url(url):
+    """psycopg 3 drives both engines, SQLite needs the aiosqlite driver."""
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    return url
+
+
+_async_engine = None
+_async_sessions = None
+
+
+def get_async_engine():
+    """Async engine, created on first use so sync-only apps never build it.
+
+    Flask runs every async view on a worker thread with a fresh event loop
+    and a connection can't outlive its loop, so the engine does not pool
+    (NullPool): every request opens a new Postgres connection. Concurrency is
+    still bounded by the gunicorn threads (WEB_WORKERS x WEB_THREADS), async
+    only overlaps the waits inside one request. Put PgBouncer in front of
+    Postgres if connection setup shows up in latency.
+    """
+    global _async_engine, _async_sessions
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        from sqlalchemy.pool import NullPool
+
+        options = {"poolclass": NullPool}
+        if settings.is_postgres and settings.db_statement_timeout_ms:
+            options["connect_args"] = {
+                "options": f"-c statement_timeout={settings.db_statement_timeout_ms}"
+            }
+        _async_engine = create_async_engine(async_url(settings.database_url), **options)
+        _async_sessions = async_sessionmaker(bind=_async_engine, expire_on_commit=False)
+    return _async_engine
+
+
+def get_async_session():
+    """Async counterpart of `get_session()` for `async def` views.
+
+    Use it as `async with get_async_session() as session:`, the session is
+    closed when the block exits.
+    """
+    get_async_engine()
+    return _async_sessions()
+
+
+def remove_session(exception=None):
+    Session.remove()
+
+
+def init_app(app):
+    app.teardown_appcontext(remove_session)
+    return app
@@ -0,0 +1,259 @@
+import asyncio
+import gzip
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, select
+from framework.database import SessionLocal
+from framework.lru import LRUCache
+from framework.metrics import track_upstream
+from framework.models import UpstreamResponse
+
+UPSTREAM_CACHE_TTL = float(os.environ.get("UPSTREAM_CACHE_TTL", "300"))
+UPSTREAM_STALE_TTL = float(os.environ.get("UPSTREAM_STALE_TTL", "86400"))
+UPSTREAM_CACHE_SIZE = int(os.environ.get("UPSTREAM_CACHE_SIZE", "2048"))
+UPSTREAM_TIMEOUT = float(os.environ.get("UPSTREAM_TIMEOUT", "10"))
+UPSTREAM_CONCURRENCY = int(os.environ.get("UPSTREAM_CONCURRENCY", "20"))
+
+# `stored_at` of snapshot entries: their age is always negative, so they stay
+# fresh until the process restarts with a newer snapshot.
+PINNED = float("inf")
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class UpstreamCache:
+    """Read-through cache for a JSON HTTP API such as the D&D 5e API.
+
+    Lookups go memory LRU -> `upstream_responses` table -> upstream. Entries
+    younger than `ttl` are fresh; entries younger than `stale_ttl` are served
+    right away while a background fetch refreshes them. Concurrent misses on
+    the same key share a single upstream request.
+    """
+
+    def __init__(self, base_url, ttl=UPSTREAM_CACHE_TTL, stale_ttl=UPSTREAM_STALE_TTL,
+                 max_entries=UPSTREAM_CACHE_SIZE, session_factory=SessionLocal, http=None,
+                 snapshot=None):
+        self.base_url = base_url.rstrip("/")
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.memory = LRUCache(max_entries)
+        self.session_factory = session_factory
+        if http is None:
+            import requests
+
+            http = requests.Session()
+        self.http = http
+        self._inflight = {}
+        self._lock = threading.Lock()
+        if snapshot and os.path.exists(snapshot):
+            self.load_snapshot(snapshot)
+
+    def url(self, resource, index=None):
+        return f"{self.base_url}/{resource}" + (f"/{index}" if index else "")
+
+    def get(self, resource, index=None):
+        key = (resource, index or "")
+        entry = self.memory.get(key)
+        if entry is None and self.session_factory is not None:
+            entry = self._load(key)
+            if entry is not None:
+                self.memory.set(key, *entry)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.time() - stored_at
+            if age < self.ttl:
+                return value
+            if age < self.stale_ttl:
+                self._revalidate(key)
+                return value
+        return self._fetch_once(key)
+
+    async def aget(self, client, resource, index=None):
+        """`get` for async views, a miss is fetched with the httpx `client`.
+
+        The event loop is never blocked: the table tier runs in a thread and
+        the upstream request is awaited. Concurrent misses are not coalesced
+        here, `aget_many` dedupes the keys of one request.
+        """
+        key = (resource, index or "")
+        entry = self.memory.get(key)
+        if entry is None and self.session_factory is not None:
+            entry = await asyncio.to_thread(self._load, key)
+            if entry is not None:
+                self.memory.set(key, *entry)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.time() - stored_at
+            if age < self.ttl:
+                return value
+            if age < self.stale_ttl:
+                self._revalidate(key)
+                return value
+        with track_upstream():
+            response = await client.get(self.url(*key))
+        response.raise_for_status()
+        value = response.json()
+        stored_at = time.time()
+        self.memory.set(key, value, stored_at)
+        if self.session_factory is not None:
+            try:
+                await asyncio.to_thread(self._store, key, value, stored_at)
+            except Exception as error:
+                print(f"Could not persist {self.url(*key)}: {error}")
+        return value
+
+    async def aget_many(self, client, keys):
+        """Fetch `(resource, index)` keys concurrently, results keep their order."""
+        keys = [(resource, index or "") for resource, index in keys]
+        unique = list(dict.fromkeys(keys))
+        values = await asyncio.gather(*(self.aget(client, *key) for key in unique))
+        found = dict(zip(unique, values))
+        return [found[key] for key in keys]
+
+    def prime(self, resource, index, value, stored_at=None):
+        self.memory.set((resource, index or ""), value, stored_at)
+
+    def load_snapshot(self, path):
+        """Prime the memory tier from a snapshot written by `save_snapshot`.
+
+        Entries never expire: a snapshot is refreshed by re-running the
+        prefetch job rather than by the request path, so a prefetched key
+        never triggers a revalidation or a fetch.
+        """
+        started = time.perf_counter()
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            snapshot = json.load(file)
+        if len(snapshot["entries"]) > self.memory.max_entries:
+            self.memory.max_entries = len(snapshot["entries"])
+        for resource, index, value in snapshot["entries"]:
+            self.prime(resource, index, value, stored_at=PINNED)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"Loaded {len(snapshot['entries'])} entries from {path} in {elapsed:.1f} ms")
+        return len(snapshot["entries"])
+
+    def _fetch(self, key):
+        with track_upstream():
+            response = self.http.get(
+                self.url(*key), headers={"Accept": "application/json"}, timeout=UPSTREAM_TIMEOUT
+            )
+        response.raise_for_status()
+        return response.json()
+
+    def _fresh(self, key):
+        entry = self.memory.get(key)
+        if entry is not None and time.time() - entry[1] < self.ttl:
+            return entry
+        return None
+
+    def _fetch_once(self, key):
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                # A fetch that finished while this caller was reading the old entry.
+                entry = self._fresh(key)
+                if entry is not None:
+                    return entry[0]
+                call = self._inflight[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        return self._lead(key, call)
+
+    def _lead(self, key, call):
+        """Fetch `key` for everyone waiting on `call`, which is registered in `_inflight`."""
+        try:
+            call.result = self._fetch(key)
+            stored_at = time.time()
+            self.memory.set(key, call.result, stored_at)
+            if self.session_factory is not None:
+                try:
+                    self._store(key, call.result, stored_at)
+                except Exception as error:
+                    # The persistent tier is best effort, the response is still good.
+                    print(f"Could not persist {self.url(*key)}: {error}")
+            return call.result
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            call.done.set()
+
+    def _revalidate(self, key):
+        # Registered before the thread starts, so the stale reads that arrive
+        # meanwhile don't start refreshes of their own.
+        with self._lock:
+            if key in self._inflight or self._fresh(key) is not None:
+                return
+            call = self._inflight[key] = _Call()
+
+        def refresh():
+            try:
+                self._lead(key, call)
+            except Exception as error:
+                print(f"Could not refresh {self.url(*key)}: {error}")
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def _load(self, key):
+        session = self.session_factory()
+        try:
+            row = session.execute(
+                select(UpstreamResponse.body, UpstreamResponse.fetched_at).where(
+                    UpstreamResponse.resource == key[0], UpstreamResponse.index == key[1]
+                )
+            ).first()
+        finally:
+            session.close()
+        if row is None:
+            return None
+        return row.body, (row.fetched_at - datetime(1970, 1, 1)).total_seconds()
+
+    def _store(self, key, value, stored_at):
+        fetched_at = datetime(1970, 1, 1) + timedelta(seconds=stored_at)
+        session = self.session_factory()
+        try:
+            session.execute(delete(UpstreamResponse).where(
+                UpstreamResponse.resource == key[0], UpstreamResponse.index == key[1]
+            ))
+            session.execute(insert(UpstreamResponse).values(
+                resource=key[0], index=key[1], body=value, fetched_at=fetched_at
+            ))
+            session.commit()
+        finally:
+            session.close()
+
+
+def async_client(**options):
+    """httpx client for `aget`; open one per async view since each runs in its
+    own event loop. At most UPSTREAM_CONCURRENCY requests are in flight."""
+    import httpx
+
+    options.setdefault("timeout", UPSTREAM_TIMEOUT)
+    options.setdefault("headers", {"Accept": "application/json"})
+    options.setdefault("limits", httpx.Limits(max_connections=UPSTREAM_CONCURRENCY))
+    return httpx.AsyncClient(**options)
+
+
+def save_snapshot(path, base_url, entries):
+    """Write `(resource, index, value)` entries as gzipped JSON."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    payload = {"base_url": base_url, "created_at": time.time(), "entries": list(entries)}
+    with gzip.open(path, "wt", encoding="utf-8") as file:
+        json.dump(payload, file, separators=(",", ":"))
+    return len(payload["entries"])
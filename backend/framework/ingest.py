@@ -0,0 +1,278 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from flask import jsonify
+from sqlalchemy import DateTime, Float, Integer, bindparam, column, update, values
+from sqlalchemy.exc import DisconnectionError, InterfaceError, OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+INGEST_BATCH_SIZE = int(os.environ.get("INGEST_BATCH_SIZE", "5000"))
+INGEST_FLUSH_INTERVAL = float(os.environ.get("INGEST_FLUSH_INTERVAL", "1.0"))
+ASSIGNMENT_CACHE_TTL = float(os.environ.get("ASSIGNMENT_CACHE_TTL", "30"))
+# Pings kept while the database is unreachable, the oldest are dropped past it.
+INGEST_MAX_BUFFER = int(os.environ.get("INGEST_MAX_BUFFER", "100000"))
+# A batch the database rejects this many times is moved to `rejected`.
+INGEST_MAX_RETRIES = int(os.environ.get("INGEST_MAX_RETRIES", "3"))
+
+logger = logging.getLogger(__name__)
+
+PING_FIELDS = ("latitude", "longitude", "recorded_at")
+# The database is unreachable or busy: the batch itself is fine, retry it as is.
+TRANSIENT_ERRORS = (OperationalError, InterfaceError, DisconnectionError, PoolTimeoutError)
+
+
+class AssignmentCache:
+    """`shipment_id -> carrier_id` for the shipments that accept pings.
+
+    `loader()` returns the whole map (e.g. every In Transit shipment); it is
+    reloaded every `ttl` seconds or after `invalidate()`.
+    """
+
+    def __init__(self, loader, ttl=ASSIGNMENT_CACHE_TTL):
+        self.loader = loader
+        self.ttl = ttl
+        self._assignments = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def owner(self, shipment_id):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl:
+            with self._lock:
+                if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl:
+                    self._assignments = dict(self.loader())
+                    self._loaded_at = time.monotonic()
+        return self._assignments.get(shipment_id)
+
+    def invalidate(self):
+        self._loaded_at = None
+
+
+def parse_timestamp(value):
+    """ISO 8601 timestamp as naive UTC, so pings with and without an offset compare."""
+    recorded_at = datetime.fromisoformat(value)
+    if recorded_at.tzinfo is not None:
+        recorded_at = recorded_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return recorded_at
+
+
+def parse_ping(data):
+    ping = {
+        "shipment_id": int(data["shipment_id"]),
+        "latitude": float(data["latitude"]),
+        "longitude": float(data["longitude"]),
+        "recorded_at": parse_timestamp(data["recorded_at"]),
+    }
+    if not -90 <= ping["latitude"] <= 90 or not -180 <= ping["longitude"] <= 180:
+        raise ValueError("Coordinates out of range")
+    return ping
+
+
+class LocationIngestor:
+    """Buffers location pings and writes them in bulk.
+
+    Every ping is appended to `history_table` (shipment_id, latitude,
+    longitude, recorded_at). The newest ping of each shipment in a flush also
+    updates `latest_table` (keyed by `id`) through `latest_columns`, a map of
+    ping field -> column. Buffers are flushed when `batch_size` pings are
+    waiting or every `flush_interval` seconds once `start()` is called.
+
+    A flush writes the buffer in transactions of at most `batch_size`
+    pings. While the database is unreachable every batch is kept for the
+    next flush, up to `max_buffer` pings in total. A batch that fails
+    `max_retries` times for any other reason (a value the table rejects) is
+    moved to `rejected` so it can't block the pings behind it.
+    """
+
+    def __init__(self, engine, history_table, latest_table, assignments, latest_columns=None,
+                 batch_size=INGEST_BATCH_SIZE, flush_interval=INGEST_FLUSH_INTERVAL,
+                 max_buffer=INGEST_MAX_BUFFER, max_retries=INGEST_MAX_RETRIES):
+        self.engine = engine
+        self.history = getattr(history_table, "__table__", history_table)
+        self.latest = getattr(latest_table, "__table__", latest_table)
+        self.assignments = assignments
+        self.latest_columns = latest_columns or {field: field for field in PING_FIELDS}
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.max_retries = max_retries
+        self.rejected = deque(maxlen=max_buffer)
+        # Batches that failed, oldest first, as [pings, failures].
+        self._pending = []
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def submit(self, carrier_id, lines):
+        """Validate NDJSON `lines` sent by `carrier_id` and buffer the good ones.
+
+        Returns `(accepted, errors)`, errors carry the 1-based line number.
+        """
+        accepted = []
+        errors = []
+        for number, line in enumerate(lines, start=1):
+            try:
+                if isinstance(line, bytes):
+                    line = line.decode("utf-8")
+                if not line.strip():
+                    continue
+                ping = parse_ping(json.loads(line))
+            except (ValueError, KeyError, TypeError) as error:
+                errors.append({"line": number, "error": f"Invalid ping: {error}"})
+                continue
+            if self.assignments.owner(ping["shipment_id"]) != carrier_id:
+                errors.append({"line": number, "error": "Shipment is not assigned to this carrier"})
+                continue
+            accepted.append(ping)
+        with self._lock:
+            self._buffer.extend(accepted)
+            self._trim_buffer()
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            try:
+                self.flush()
+            except Exception:
+                # The pings are buffered, the next flush retries them.
+                logger.exception("Location flush failed")
+        return len(accepted), errors
+
+    def flush(self):
+        """Write every buffered ping, returns how many were written.
+
+        Raises the first error once every batch was tried; the failed batches
+        stay queued for the next flush.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batches = self._pending + [
+                    [self._buffer[start:start + self.batch_size], 0]
+                    for start in range(0, len(self._buffer), self.batch_size)
+                ]
+                self._pending, self._buffer = [], []
+            written = 0
+            kept = []
+            error = None
+            for position, (pings, failures) in enumerate(batches):
+                try:
+                    with self.engine.begin() as conn:
+                        self._write_history(conn, pings)
+                        self._write_latest(conn, pings)
+                except TRANSIENT_ERRORS as exc:
+                    # Retried without counting, the batches behind it would fail the same way.
+                    error = error or exc
+                    kept.extend(batches[position:])
+                    break
+                except Exception as exc:
+                    error = error or exc
+                    if failures + 1 >= self.max_retries:
+                        logger.error(
+                            "Moving %d pings aside after %d failed flushes", len(pings), failures + 1,
+                            exc_info=exc,
+                        )
+                        self.rejected.extend(pings)
+                    else:
+                        kept.append([pings, failures + 1])
+                    continue
+                written += len(pings)
+            if kept:
+                with self._lock:
+                    self._pending[:0] = kept
+                    self._trim_buffer()
+            if error is not None:
+                raise error
+            return written
+
+    def _trim_buffer(self):
+        # Called with `_lock` held, drops the oldest pings past `max_buffer`.
+        overflow = sum(len(pings) for pings, _ in self._pending) + len(self._buffer) - self.max_buffer
+        if overflow <= 0:
+            return
+        logger.error("Location buffer full, dropping the %d oldest pings", overflow)
+        for pings in [pings for pings, _ in self._pending] + [self._buffer]:
+            dropped = pings[:overflow]
+            self.rejected.extend(dropped)
+            del pings[:overflow]
+            overflow -= len(dropped)
+            if overflow <= 0:
+                break
+        self._pending = [batch for batch in self._pending if batch[0]]
+
+    def _write_history(self, conn, pings):
+        columns = ("shipment_id",) + PING_FIELDS
+        if conn.dialect.name == "postgresql":
+            from psycopg import sql
+
+            statement = sql.SQL("COPY {} ({}) FROM STDIN").format(
+                sql.Identifier(self.history.name),
+                sql.SQL(", ").join(sql.Identifier(name) for name in columns),
+            )
+            cursor = conn.connection.dbapi_connection.cursor()
+            with cursor.copy(statement) as copy:
+                for ping in pings:
+                    copy.write_row(tuple(ping[name] for name in columns))
+        else:
+            conn.execute(self.history.insert(), pings)
+
+    def _write_latest(self, conn, pings):
+        newest = {}
+        for ping in pings:
+            current = newest.get(ping["shipment_id"])
+            if current is None or ping["recorded_at"] >= current["recorded_at"]:
+                newest[ping["shipment_id"]] = ping
+        recorded_at = self.latest.c[self.latest_columns["recorded_at"]]
+        if conn.dialect.name == "postgresql":
+            batch = values(
+                column("id", Integer),
+                column("latitude", Float),
+                column("longitude", Float),
+                column("recorded_at", DateTime),
+                name="pings",
+            ).data([tuple(ping[name] for name in ("shipment_id",) + PING_FIELDS) for ping in newest.values()])
+            conn.execute(
+                update(self.latest)
+                .where(self.latest.c.id == batch.c.id)
+                .where((recorded_at.is_(None)) | (recorded_at < batch.c.recorded_at))
+                .values({self.latest_columns[field]: batch.c[field] for field in PING_FIELDS})
+            )
+        else:
+            conn.execute(
+                update(self.latest)
+                .where(self.latest.c.id == bindparam("_id"))
+                .where((recorded_at.is_(None)) | (recorded_at < bindparam("_recorded_at")))
+                .values({self.latest_columns[field]: bindparam(f"_{field}") for field in PING_FIELDS}),
+                [
+                    {"_id": ping["shipment_id"], **{f"_{field}": ping[field] for field in PING_FIELDS}}
+                    for ping in newest.values()
+                ],
+            )
+
+    def start(self):
+        def run():
+            while not self._stopped.wait(self.flush_interval):
+                try:
+                    self.flush()
+                except Exception:
+                    logger.exception("Location flush failed")
+
+        self._stopped.clear()
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+
+def ingest_response(ingestor, carrier_id, lines):
+    accepted, errors = ingestor.submit(carrier_id, lines)
+    return jsonify({"success": not errors, "data": {"accepted": accepted, "errors": errors}}), 202
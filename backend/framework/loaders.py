@@ -0,0 +1,164 @@
+import csv
+import hashlib
+import os
+from sqlalchemy import delete, insert, select, text
+from framework.database import get_engine
+from framework.models import SeedLog
+from framework.reports import invalidate_tables
+
+# Rows are read and written in chunks, memory stays constant no matter how
+# big the CSV files are.
+CSV_CHUNK_SIZE = int(os.environ.get("CSV_CHUNK_SIZE", "10000"))
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_header(path):
+    with open(path, newline="", encoding="utf-8") as file:
+        return next(csv.reader(file))
+
+
+def read_chunks(path, columns, chunk_size=None):
+    """Yield lists of tuples with the values of `columns`, empty cells are None."""
+    chunk_size = chunk_size or CSV_CHUNK_SIZE
+    with open(path, newline="", encoding="utf-8") as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        positions = [header.index(column) for column in columns]
+        chunk = []
+        for row in reader:
+            if not row:
+                continue
+            chunk.append(tuple(row[i] if row[i] != "" else None for i in positions))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def seed_key(table, path):
+    return f"csv:{table.name}:{os.path.basename(path)}"
+
+
+def applied_hash(conn, name):
+    return conn.execute(
+        select(SeedLog.content_hash).where(SeedLog.name == name)
+    ).scalar()
+
+
+def record_seed(conn, name, content_hash):
+    conn.execute(delete(SeedLog).where(SeedLog.name == name))
+    conn.execute(insert(SeedLog).values(name=name, content_hash=content_hash))
+
+
+def copy_rows(conn, table, columns, chunks):
+    from psycopg import sql
+
+    statement = sql.SQL("COPY {} ({}) FROM STDIN").format(
+        sql.Identifier(table.name),
+        sql.SQL(", ").join(sql.Identifier(column) for column in columns),
+    )
+    total = 0
+    cursor = conn.connection.dbapi_connection.cursor()
+    with cursor.copy(statement) as copy:
+        for chunk in chunks:
+            for row in chunk:
+                copy.write_row(row)
+            total += len(chunk)
+    _sync_sequence(conn, table, columns)
+    return total
+
+
+def _sync_sequence(conn, table, columns):
+    # COPY with explicit ids does not move the serial sequence forward.
+    for column in table.primary_key.columns:
+        if column.name in columns and column.autoincrement is not False:
+            conn.execute(
+                text(
+                    f"SELECT setval(pg_get_serial_sequence('{table.name}', '{column.name}'), "
+                    f"COALESCE((SELECT MAX({column.name}) FROM {table.name}), 1))"
+                )
+            )
+
+
+def insert_rows(conn, table, columns, chunks):
+    total = 0
+    statement = table.insert()
+    for chunk in chunks:
+        conn.execute(statement, [dict(zip(columns, row)) for row in chunk])
+        total += len(chunk)
+    return total
+
+
+def _write(conn, table, path, columns, chunk_size):
+    chunks = read_chunks(path, columns, chunk_size)
+    if conn.dialect.name == "postgresql":
+        return copy_rows(conn, table, columns, chunks)
+    return insert_rows(conn, table, columns, chunks)
+
+
+def _table_order(tables):
+    if not tables:
+        return {}
+    sorted_tables = tables[0].metadata.sorted_tables
+    return {table: sorted_tables.index(table) for table in tables}
+
+
+def load_csv_files(files, engine=None, chunk_size=None, columns=None):
+    """Load `(table, path)` pairs in parent -> child order.
+
+    Files whose content hash is already recorded in seed_log are skipped.
+    When a file changed since the last run its table, and the tables loaded
+    after it, are emptied and loaded again; everything happens in one
+    transaction.
+    """
+    engine = engine or get_engine()
+    columns = columns or {}
+    order = _table_order([table for table, _ in files])
+    files = sorted(files, key=lambda item: order[item[0]])
+    loaded = {}
+    with engine.begin() as conn:
+        pending = []
+        reload_children = False
+        for table, path in files:
+            name = seed_key(table, path)
+            content_hash = file_hash(path)
+            previous = applied_hash(conn, name)
+            if previous == content_hash and not reload_children:
+                print(f"Skipping {path}, already loaded.")
+                continue
+            # Emptying a parent table means its children must be reloaded too.
+            reload_children = reload_children or previous is not None
+            pending.append((table, path, name, content_hash, previous))
+
+        # Children first so foreign keys are never violated.
+        for table, _, _, _, previous in reversed(pending):
+            if previous is not None:
+                conn.execute(delete(table))
+
+        for table, path, name, content_hash, _ in pending:
+            table_columns = columns.get(table.name) or read_header(path)
+            total = _write(conn, table, path, table_columns, chunk_size)
+            record_seed(conn, name, content_hash)
+            loaded[table.name] = total
+            print(f"Loaded {total} rows from {path} into {table.name}.")
+        invalidate_tables(conn, loaded)
+    return loaded
+
+
+def load_csv(table, path, engine=None, chunk_size=None, columns=None):
+    loaded = load_csv_files(
+        [(table, path)],
+        engine=engine,
+        chunk_size=chunk_size,
+        columns={table.name: columns} if columns else None,
+    )
+    return loaded.get(table.name, 0)
@@ -0,0 +1,235 @@
+import contextvars
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import Response, current_app, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+METRICS_PATH = os.environ.get("METRICS_PATH", "/metrics")
+# Same statement this many times in one request is reported as a likely N+1.
+METRICS_N_PLUS_ONE_THRESHOLD = int(os.environ.get("METRICS_N_PLUS_ONE_THRESHOLD", "5"))
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current = contextvars.ContextVar("framework_metrics_request", default=None)
+
+
+class RequestStats:
+    """What one request spent, filled in by the cursor and upstream hooks."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.upstream_calls = 0
+        self.upstream_seconds = 0.0
+        self.statements = Counter()
+
+
+@contextmanager
+def track_upstream():
+    """Add the time spent in the block to the current request's upstream time."""
+    stats = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            stats.upstream_calls += 1
+            stats.upstream_seconds += time.perf_counter() - started
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.seconds = 0.0
+        self.statuses = Counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.upstream_calls = 0
+        self.upstream_seconds = 0.0
+        self.response_bytes = 0
+        self.n_plus_one = 0
+
+    def observe(self, seconds, status, stats, size, suspects):
+        self.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.seconds += seconds
+        self.statuses[status] += 1
+        self.queries += stats.queries
+        self.db_seconds += stats.db_seconds
+        self.upstream_calls += stats.upstream_calls
+        self.upstream_seconds += stats.upstream_seconds
+        self.response_bytes += size
+        self.n_plus_one += len(suspects)
+
+
+class Metrics:
+    """Flask extension recording per-route request metrics.
+
+    For every route it keeps a latency histogram, the number of SQL
+    statements and the time spent in them (SQLAlchemy cursor events on every
+    engine), the time spent in upstream HTTP calls made through
+    `UpstreamCache` or `track_upstream()`, and the bytes sent. They are served
+    in the Prometheus text format on METRICS_PATH. A statement repeated
+    METRICS_N_PLUS_ONE_THRESHOLD times in one request is logged as a warning.
+
+    Numbers are per process: with several gunicorn workers each scrape sees
+    the worker that answered it.
+    """
+
+    def __init__(self, app=None, path=METRICS_PATH, n_plus_one_threshold=METRICS_N_PLUS_ONE_THRESHOLD):
+        self.path = path
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.routes = {}
+        self._lock = threading.Lock()
+        _install_cursor_events()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions["metrics"] = self
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.add_url_rule(self.path, "framework_metrics", self.render_view)
+        return app
+
+    def _before_request(self):
+        if request.path != self.path:
+            request.environ["framework.metrics"] = _current.set(RequestStats())
+
+    def _after_request(self, response):
+        if "framework.metrics" not in request.environ:
+            return response
+        stats = _current.get()
+        seconds = time.perf_counter() - stats.started
+        route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+        suspects = [
+            (statement, count)
+            for statement, count in stats.statements.items()
+            if count >= self.n_plus_one_threshold
+        ]
+        for statement, count in suspects:
+            current_app.logger.warning(
+                "Possible N+1 in %s %s: statement ran %d times: %s", request.method, route, count, statement
+            )
+        # A streamed body's size is only known once it was sent, its bytes
+        # are added as the server pulls them from the wrapped iterable.
+        size = 0 if response.is_streamed else response.content_length or 0
+        with self._lock:
+            metrics = self.routes.get((route, request.method))
+            if metrics is None:
+                metrics = self.routes[(route, request.method)] = RouteMetrics()
+            metrics.observe(seconds, response.status_code, stats, size, suspects)
+        if response.is_streamed:
+            response.response = self._count_bytes(response.response, metrics)
+        return response
+
+    def _count_bytes(self, body, metrics):
+        try:
+            for chunk in body:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode()
+                with self._lock:
+                    metrics.response_bytes += len(chunk)
+                yield chunk
+        finally:
+            if hasattr(body, "close"):
+                body.close()
+
+    def _teardown_request(self, exception=None):
+        token = request.environ.pop("framework.metrics", None)
+        if token is not None:
+            _current.reset(token)
+
+    def render_view(self):
+        return Response(self.render(), mimetype="text/plain; version=0.0.4")
+
+    def render(self):
+        """Every route's metrics in the Prometheus text exposition format."""
+        with self._lock:
+            routes = sorted(self.routes.items())
+            lines = [
+                "# HELP http_request_duration_seconds Time to build the response.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for (route, method), metrics in routes:
+                labels = f'route="{_escape(route)}",method="{method}"'
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), metrics.buckets):
+                    cumulative += count
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"http_request_duration_seconds_sum{{{labels}}} {metrics.seconds:.6f}")
+                lines.append(f"http_request_duration_seconds_count{{{labels}}} {metrics.count}")
+
+            lines += ["# HELP http_requests_total Responses by status.", "# TYPE http_requests_total counter"]
+            for (route, method), metrics in routes:
+                labels = f'route="{_escape(route)}",method="{method}"'
+                for status, count in sorted(metrics.statuses.items()):
+                    lines.append(f'http_requests_total{{{labels},status="{status}"}} {count}')
+
+            for name, attribute, help_text in (
+                ("http_request_db_queries_total", "queries", "SQL statements executed."),
+                ("http_request_db_seconds_total", "db_seconds", "Time spent in SQL statements."),
+                ("http_request_upstream_calls_total", "upstream_calls", "Upstream HTTP calls."),
+                ("http_request_upstream_seconds_total", "upstream_seconds", "Time spent in upstream HTTP calls."),
+                ("http_response_bytes_total", "response_bytes", "Response body bytes."),
+                ("http_request_n_plus_one_total", "n_plus_one", "Statements repeated past the N+1 threshold."),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                for (route, method), metrics in routes:
+                    value = getattr(metrics, attribute)
+                    value = f"{value:.6f}" if isinstance(value, float) else value
+                    lines.append(f'{name}{{route="{_escape(route)}",method="{method}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            self.routes.clear()
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+_installed = False
+
+
+def _install_cursor_events():
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("framework_metrics_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = conn.info.get("framework_metrics_started")
+    if stats is None or not started:
+        return
+    stats.db_seconds += time.perf_counter() - started.pop()
+    stats.queries += 1
+    # Parameters are left out, so per-row lookups collapse into one statement.
+    stats.statements[statement] += 1
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute.
+    conn = exception_context.connection
+    started = conn.info.get("framework_metrics_started") if conn is not None else None
+    if started:
+        started.pop()
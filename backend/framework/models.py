@@ -1,10 +1,37 @@
-from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy import Column, Integer, String, JSON, DateTime, func, JSON, Text, DateTime
+from sqlalchemy import Boolean, Column, false, Integer, String, JSON, DateTime, func
 from sqlalchemy.ext.declarative import declarative_base
-from datetime import datetime
 
 Base = declarative_base()
 class MotivationalPhrase(Base):
     __tablename__ = 'motivational_phrases'
     id = Column(Integer, primary_key=True)
-    phrase = Column(String)
+    phrase = Column(String, unique=True, index=True)
+
+
+class SeedLog(Base):
+    __tablename__ = 'seed_log'
+    name = Column(String, primary_key=True)
+    content_hash = Column(String, nullable=False)
+    applied_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class ReportSnapshot(Base):
+    __tablename__ = 'report_snapshots'
+    name = Column(String, primary_key=True)
+    data = Column(JSON)
+    stale = Column(Boolean, nullable=False, default=False, server_default=false())
+    refreshed_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class UpstreamResponse(Base):
+    __tablename__ = 'upstream_responses'
+    resource = Column(String, primary_key=True)
+    index = Column(String, primary_key=True)
+    body = Column(JSON)
+    fetched_at = Column(DateTime, nullable=False)
+
+
+class ReferenceVersion(Base):
+    __tablename__ = 'reference_versions'
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0, server_default='0')
@@ -0,0 +1,134 @@
+import base64
+import json
+import os
+from datetime import date, datetime
+from sqlalchemy import select, tuple_, union
+from werkzeug.exceptions import BadRequest
+
+PAGE_SIZE = int(os.environ.get("PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.environ.get("MAX_PAGE_SIZE", "500"))
+
+
+class InvalidPage(BadRequest, ValueError):
+    """Bad `cursor` or `limit`. Left uncaught in a view it answers 400 with
+    `{"success": false, "error": ...}`."""
+
+    def get_body(self, environ=None, scope=None):
+        return json.dumps({"success": False, "error": self.description})
+
+    def get_headers(self, environ=None, scope=None):
+        return [("Content-Type", "application/json")]
+
+
+def _dump(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _load(value):
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    if isinstance(value, dict) and "d" in value:
+        return date.fromisoformat(value["d"])
+    return value
+
+
+def encode_cursor(values):
+    payload = json.dumps([_dump(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return [_load(value) for value in json.loads(base64.urlsafe_b64decode(padded))]
+    except (ValueError, TypeError) as error:
+        raise InvalidPage("Invalid cursor") from error
+
+
+def page_size(requested=None):
+    if requested in (None, ""):
+        return PAGE_SIZE
+    try:
+        requested = int(requested)
+    except (ValueError, TypeError) as error:
+        raise InvalidPage("Invalid limit") from error
+    return max(1, min(requested, MAX_PAGE_SIZE))
+
+
+def after(order_by, values, descending=False):
+    """WHERE clause selecting the rows strictly after `values` in `order_by`."""
+    if len(order_by) > 1 and not descending:
+        return tuple_(*order_by) > tuple_(*values)
+    if len(order_by) > 1:
+        return tuple_(*order_by) < tuple_(*values)
+    return order_by[0] < values[0] if descending else order_by[0] > values[0]
+
+
+def keyset_select(statement, order_by, cursor=None, limit=None, descending=False):
+    """Apply keyset pagination to `statement`.
+
+    `order_by` must end with a unique column (usually the primary key) so the
+    order is total. With an index on the same columns every page is an index
+    range scan that starts right after the cursor, the cost of page 1000 is
+    the cost of page 1. Fetches one extra row to know if there is a next page.
+    """
+    limit = page_size(limit)
+    if cursor:
+        statement = statement.where(after(order_by, decode_cursor(cursor), descending))
+    ordering = [column.desc() for column in order_by] if descending else list(order_by)
+    return statement.order_by(*ordering).limit(limit + 1), limit
+
+
+def keyset_union(table, scope_columns, value, order_columns, cursor=None, limit=None,
+                 where=(), descending=False):
+    """Keyset page over rows where any of `scope_columns` equals `value`.
+
+    Written as a UNION of one keyset page per scope column instead of
+    `a = :v OR b = :v`: each branch walks its own (scope, *order) index from
+    the cursor and stops after one page, then the branches are merged.
+    """
+    limit = page_size(limit)
+    values = decode_cursor(cursor) if cursor else None
+    branches = []
+    for name in scope_columns:
+        order_by = [table.c[column] for column in order_columns]
+        branch = select(table).where(table.c[name] == value, *where)
+        if values is not None:
+            branch = branch.where(after(order_by, values, descending))
+        ordering = [column.desc() for column in order_by] if descending else order_by
+        branches.append(select(branch.order_by(*ordering).limit(limit + 1).subquery()))
+    merged = union(*branches).subquery()
+    order_by = [merged.c[column] for column in order_columns]
+    ordering = [column.desc() for column in order_by] if descending else order_by
+    return select(merged).order_by(*ordering).limit(limit + 1), limit
+
+
+def fetch_page(conn, statement, limit, key):
+    """Run a statement from `keyset_select`/`keyset_union`.
+
+    `key(row)` returns the row's order values. Returns `(rows, next_cursor)`;
+    `next_cursor` is None on the last page.
+    """
+    rows = conn.execute(statement).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(key(rows[-1]))
+    return rows, next_cursor
+
+
+def create_keyset_indexes(op, table_name, scope_columns, order_columns):
+    """Create `(scope, *order)` indexes from a migration, one per scope column."""
+    for scope in scope_columns:
+        columns = [scope, *order_columns]
+        op.create_index(f"ix_{table_name}_{'_'.join(columns)}", table_name, columns)
+
+
+def drop_keyset_indexes(op, table_name, scope_columns, order_columns):
+    for scope in scope_columns:
+        columns = [scope, *order_columns]
+        op.drop_index(f"ix_{table_name}_{'_'.join(columns)}", table_name=table_name)
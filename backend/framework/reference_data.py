@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+
+from flask import jsonify
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+from framework.database import flushed_tables
+from framework.models import ReferenceVersion
+from framework.seeding import insert_statement
+
+REFERENCE_CHECK_INTERVAL = float(os.environ.get("REFERENCE_CHECK_INTERVAL", "5"))
+
+# name -> (loader, table names the set is read from)
+_sets = {}
+# name -> (version, data)
+_cache = {}
+_checked_at = None
+_versions = {}
+_lock = threading.Lock()
+
+
+def reference(name, tables):
+    """Register `loader(session)` as the reference set `name`.
+
+    The loader returns a dict, usually `id -> row` of a small table such as
+    warehouses, stores or carriers. Every process keeps it in memory and
+    reloads it only when the set's version in reference_versions moves, which
+    happens on any flush touching `tables`.
+    """
+    def decorator(loader):
+        _sets[name] = (loader, set(tables))
+        return loader
+    return decorator
+
+
+def sets_for_tables(table_names):
+    table_names = set(table_names)
+    return sorted(name for name, (_, tables) in _sets.items() if tables & table_names)
+
+
+def bump_versions(conn, table_names):
+    """Invalidate the reference sets read from `table_names` in every process.
+
+    ORM flushes do this automatically, call it after Core bulk writes.
+    """
+    global _checked_at
+    names = sets_for_tables(table_names)
+    for name in names:
+        conn.execute(insert_statement(conn, ReferenceVersion.__table__).values(name=name, version=0))
+        conn.execute(
+            update(ReferenceVersion)
+            .where(ReferenceVersion.name == name)
+            .values(version=ReferenceVersion.version + 1)
+        )
+    if names:
+        _checked_at = None
+    return names
+
+
+def _current_versions(session):
+    """Versions of every set, read at most once per REFERENCE_CHECK_INTERVAL."""
+    global _checked_at, _versions
+    now = time.monotonic()
+    if _checked_at is None or now - _checked_at >= REFERENCE_CHECK_INTERVAL:
+        _versions = dict(session.execute(select(ReferenceVersion.name, ReferenceVersion.version)).all())
+        _checked_at = now
+    return _versions
+
+
+def get_reference(session, name):
+    """The cached reference set `name`, reloaded first when its version moved."""
+    if name not in _sets:
+        raise KeyError(name)
+    version = _current_versions(session).get(name, 0)
+    entry = _cache.get(name)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    with _lock:
+        entry = _cache.get(name)
+        if entry is None or entry[0] != version:
+            loader, _ = _sets[name]
+            entry = (version, loader(session))
+            _cache[name] = entry
+    return entry[1]
+
+
+def clear_references():
+    global _checked_at
+    _cache.clear()
+    _checked_at = None
+
+
+def validate_batch(items, validate):
+    """Run `validate(item)` on every item; it returns a list of error messages.
+
+    Returns one result per item in the order of `items`: `{"index", "ok"}`
+    plus `"errors"` for the rejected ones.
+    """
+    results = []
+    for index, item in enumerate(items):
+        try:
+            errors = list(validate(item) or [])
+        except (KeyError, TypeError, ValueError) as error:
+            errors = [f"Invalid item: {error}"]
+        result = {"index": index, "ok": not errors}
+        if errors:
+            result["errors"] = errors
+        results.append(result)
+    return results
+
+
+def bulk_create(conn, table, items, validate, to_row=None, id_column="id"):
+    """Validate `items` and insert the valid ones with a single INSERT.
+
+    `to_row(item)` maps an item to the row to insert (the item itself by
+    default). Results come back in the order of `items`, the created ones
+    carry the new `id`. Reference checks in `validate` should read from
+    `get_reference` so the whole batch costs one round trip for the insert.
+    """
+    table = getattr(table, "__table__", table)
+    to_row = to_row or (lambda item: item)
+    results = validate_batch(items, validate)
+    created = [result for result in results if result["ok"]]
+    if created:
+        rows = [to_row(items[result["index"]]) for result in created]
+        statement = insert(table).returning(table.c[id_column], sort_by_parameter_order=True)
+        ids = conn.execute(statement, rows).scalars().all()
+        for result, new_id in zip(created, ids):
+            result["id"] = new_id
+    return results
+
+
+def bulk_response(results):
+    """201 when every item was created, 207 with the per-item errors otherwise."""
+    success = all(result["ok"] for result in results)
+    return jsonify({"success": success, "data": results}), 201 if success else 207
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_flushed_tables(session, flush_context):
+    tables = flushed_tables(session, exclude={ReferenceVersion.__tablename__})
+    if tables and sets_for_tables(tables):
+        bump_versions(session.connection(), tables)
@@ -0,0 +1,110 @@
+from flask import jsonify
+from sqlalchemy import delete, event, func, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from framework.database import flushed_tables
+from framework.models import ReportSnapshot
+
+# name -> (function, table names the report reads)
+_reports = {}
+
+
+def report(name, tables):
+    """Register `function(session)` as the report `name`.
+
+    The result is stored in report_snapshots and served from there until a
+    flush touches one of `tables`, which marks the snapshot stale.
+    """
+    def decorator(function):
+        _reports[name] = (function, set(tables))
+        return function
+    return decorator
+
+
+def reports_for_tables(table_names):
+    table_names = set(table_names)
+    return sorted(name for name, (_, tables) in _reports.items() if tables & table_names)
+
+
+_upserts = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def _store_snapshot(session, name, data):
+    build = _upserts.get(session.get_bind().dialect.name)
+    if build is None:
+        session.execute(delete(ReportSnapshot).where(ReportSnapshot.name == name))
+        session.execute(insert(ReportSnapshot).values(name=name, data=data, stale=False))
+        return
+    # An upsert, so two requests refreshing the same report at once both succeed.
+    statement = build(ReportSnapshot).values(name=name, data=data, stale=False)
+    session.execute(statement.on_conflict_do_update(
+        index_elements=[ReportSnapshot.name],
+        set_={"data": statement.excluded.data, "stale": False, "refreshed_at": func.now()},
+    ))
+
+
+def _refresh(bind, name):
+    # Own session and transaction: the caller's pending work is never committed
+    # by a report refresh.
+    function, _ = _reports[name]
+    with Session(bind=bind) as own:
+        data = function(own)
+        _store_snapshot(own, name, data)
+        own.commit()
+    return data
+
+
+def refresh_reports(session, names=None):
+    """Compute the given reports (all of them by default) and store them.
+
+    Reports read and write through their own session on `session`'s bind, so
+    they see committed data and leave `session` untouched.
+    """
+    names = list(names) if names is not None else sorted(_reports)
+    bind = session.get_bind()
+    for name in names:
+        _refresh(bind, name)
+    return names
+
+
+def invalidate_tables(conn, table_names):
+    """Mark the reports that read `table_names` as stale.
+
+    ORM flushes do this automatically, call it after Core bulk writes such as
+    framework loaders.
+    """
+    names = reports_for_tables(table_names)
+    if names:
+        conn.execute(
+            update(ReportSnapshot).where(ReportSnapshot.name.in_(names)).values(stale=True)
+        )
+    return names
+
+
+def get_report(session, name):
+    """Key lookup of a stored report, refreshed first when it is stale."""
+    if name not in _reports:
+        raise KeyError(name)
+    # The caller's pending rows don't belong in the report, don't flush them.
+    with session.no_autoflush:
+        snapshot = session.get(ReportSnapshot, name, populate_existing=True)
+    if snapshot is not None and not snapshot.stale:
+        return snapshot.data
+    data = _refresh(session.get_bind(), name)
+    if snapshot is not None:
+        session.expire(snapshot)
+    return data
+
+
+def report_response(session, name):
+    return jsonify({"success": True, "data": get_report(session, name)})
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_flushed_tables(session, flush_context):
+    tables = flushed_tables(session, exclude={ReportSnapshot.__tablename__})
+    if tables and reports_for_tables(tables):
+        invalidate_tables(session.connection(), tables)
@@ -0,0 +1,276 @@
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from functools import wraps
+
+from flask import Response, current_app, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from framework.database import flushed_tables
+from framework.lru import LRUCache
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is always available
+    brotli = None
+
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", "60"))
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_BACKEND = os.environ.get("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_PATH = os.environ.get("RESPONSE_CACHE_PATH", "/tmp/response_cache.sqlite3")
+RESPONSE_CACHE_MIN_COMPRESS = int(os.environ.get("RESPONSE_CACHE_MIN_COMPRESS", "512"))
+
+ENTRY_FIELDS = ("mimetype", "etag", "body", "gzip", "br", "headers")
+# Headers the cache computes itself, or that must never be replayed to another client.
+UNCACHED_HEADERS = {
+    "content-length", "content-type", "content-encoding", "etag", "vary", "cache-control",
+    "set-cookie", "x-cache",
+}
+
+# Every live ResponseCache, so ORM commits can bump the tables they wrote.
+_caches = weakref.WeakSet()
+
+
+class MemoryBackend:
+    """Per-process tier: an LRU of entries plus table version counters."""
+
+    def __init__(self, max_entries=RESPONSE_CACHE_SIZE):
+        self.entries = LRUCache(max_entries)
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def set(self, key, entry):
+        self.entries.set(key, entry)
+
+    def versions(self, tables):
+        return {table: self._versions.get(table, 0) for table in tables}
+
+    def bump(self, tables):
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def clear(self):
+        self.entries.clear()
+
+
+class SQLiteBackend:
+    """Tier shared by every worker on the host through a local SQLite file.
+
+    Version counters live in the same file, so a write handled by one worker
+    invalidates the cached responses of all of them.
+    """
+
+    def __init__(self, path=RESPONSE_CACHE_PATH, max_entries=RESPONSE_CACHE_SIZE):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, mimetype TEXT, "
+            "etag TEXT NOT NULL, body BLOB NOT NULL, gzip BLOB, br BLOB, headers TEXT, "
+            "stored_at REAL NOT NULL)"
+        )
+        try:
+            # Cache files created before headers were stored.
+            conn.execute("ALTER TABLE entries ADD COLUMN headers TEXT")
+        except sqlite3.OperationalError:
+            pass
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS versions (tag TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+        )
+
+    def _connect(self):
+        # One connection per thread, and never one inherited through fork.
+        conn, pid = getattr(self._local, "conn", (None, None))
+        if conn is None or pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = (conn, os.getpid())
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute(
+            "SELECT mimetype, etag, body, gzip, br, headers, stored_at FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        entry = dict(zip(ENTRY_FIELDS, row[:-1]))
+        entry["headers"] = json.loads(entry["headers"] or "[]")
+        return {name: value for name, value in entry.items() if value is not None}, row[-1]
+
+    def set(self, key, entry):
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, mimetype, etag, body, gzip, br, headers, stored_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                key, *(entry.get(name) for name in ENTRY_FIELDS[:-1]),
+                json.dumps(entry.get("headers", [])), time.time(),
+            ),
+        )
+        self._writes += 1
+        if self._writes % 100 == 0:
+            conn.execute(
+                "DELETE FROM entries WHERE key NOT IN "
+                "(SELECT key FROM entries ORDER BY stored_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def versions(self, tables):
+        tables = list(tables)
+        placeholders = ",".join("?" for _ in tables)
+        rows = self._connect().execute(
+            f"SELECT tag, version FROM versions WHERE tag IN ({placeholders})", tables
+        ).fetchall()
+        found = dict(rows)
+        return {table: found.get(table, 0) for table in tables}
+
+    def bump(self, tables):
+        conn = self._connect()
+        for table in tables:
+            conn.execute(
+                "INSERT INTO versions (tag, version) VALUES (?, 1) "
+                "ON CONFLICT(tag) DO UPDATE SET version = version + 1",
+                (table,),
+            )
+
+    def clear(self):
+        self._connect().execute("DELETE FROM entries")
+
+
+def default_backend():
+    if RESPONSE_CACHE_BACKEND == "sqlite":
+        return SQLiteBackend()
+    return MemoryBackend()
+
+
+class ResponseCache:
+    """Flask extension caching whole GET responses of read-mostly routes.
+
+    `@cache.cached(ttl, tables=[...])` stores the rendered body (plus gzip
+    and, when the brotli package is installed, br versions) keyed by path,
+    query string, the caller's credentials (Authorization and Cookie headers)
+    and the version counters of `tables`. Committing an ORM
+    write to one of those tables, or calling `invalidate`, bumps its counter
+    so the next request renders again. Every response carries a strong ETag,
+    one per content coding, and a matching `If-None-Match` gets a 304
+    without a body. Hits never
+    touch the view, the database or the JSON encoder.
+    """
+
+    def __init__(self, app=None, backend=None):
+        self.backend = backend or default_backend()
+        _caches.add(self)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions["response_cache"] = self
+        return app
+
+    def invalidate(self, *tables):
+        """Bump `tables`; call it after Core writes, ORM commits do it already."""
+        if tables:
+            self.backend.bump(tables)
+
+    def clear(self):
+        self.backend.clear()
+
+    def cached(self, ttl=RESPONSE_CACHE_TTL, tables=()):
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method not in ("GET", "HEAD"):
+                    return view(*args, **kwargs)
+                key = self._key(self.backend.versions(tables) if tables else {})
+                hit = self.backend.get(key)
+                if hit is not None and time.time() - hit[1] < ttl:
+                    return self._respond(hit[0], "HIT")
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed or "Set-Cookie" in response.headers:
+                    return response
+                entry = _entry(response)
+                self.backend.set(key, entry)
+                return self._respond(entry, "MISS")
+            return wrapper
+        return decorator
+
+    def _key(self, versions):
+        query = "&".join(sorted(request.query_string.decode("latin-1").split("&")))
+        tags = ",".join(f"{table}:{version}" for table, version in sorted(versions.items()))
+        # Role scoped responses must never reach another user: every set of
+        # credentials gets its own entries.
+        identity = "\n".join(request.headers.get(name, "") for name in ("Authorization", "Cookie"))
+        return hashlib.sha256(f"{request.path}?{query}|{tags}|{identity}".encode("utf-8")).hexdigest()
+
+    def _respond(self, entry, status):
+        body, encoding = entry["body"], None
+        accepted = request.accept_encodings
+        if "br" in entry and accepted["br"]:
+            body, encoding = entry["br"], "br"
+        elif "gzip" in entry and accepted["gzip"]:
+            body, encoding = entry["gzip"], "gzip"
+        # A strong ETag names the exact bytes, so every coding gets its own.
+        etag = f"{entry['etag']}-{encoding}" if encoding else entry["etag"]
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(body, status=200, mimetype=entry["mimetype"])
+            for name, value in entry.get("headers", ()):
+                response.headers.add(name, value)
+            if encoding:
+                response.headers["Content-Encoding"] = encoding
+        response.set_etag(etag)
+        response.headers["Vary"] = "Accept-Encoding, Authorization, Cookie"
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["X-Cache"] = status
+        return response
+
+
+def _entry(response):
+    body = response.get_data()
+    entry = {
+        "body": body,
+        "mimetype": response.mimetype,
+        "etag": hashlib.sha256(body).hexdigest()[:32],
+        "headers": [
+            [name, value] for name, value in response.headers.items()
+            if name.lower() not in UNCACHED_HEADERS
+        ],
+    }
+    if len(body) >= RESPONSE_CACHE_MIN_COMPRESS:
+        entry["gzip"] = gzip.compress(body, compresslevel=6)
+        if brotli is not None:
+            entry["br"] = brotli.compress(body, quality=5)
+    return entry
+
+
+@event.listens_for(Session, "after_flush")
+def _remember_flushed_tables(session, flush_context):
+    session.info.setdefault("response_cache_tables", set()).update(flushed_tables(session))
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_committed_tables(session):
+    # Bumped after the commit, not at flush time: a request rendering in
+    # between would otherwise cache the old rows under the new version.
+    tables = session.info.pop("response_cache_tables", None)
+    if tables:
+        for cache in list(_caches):
+            cache.invalidate(*tables)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_flushed_tables(session):
+    session.info.pop("response_cache_tables", None)
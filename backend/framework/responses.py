@@ -0,0 +1,68 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from flask import Response
+from framework.database import get_engine, stream_rows
+
+
+def json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _dumps(value):
+    return json.dumps(value, default=json_default, separators=(",", ":"))
+
+
+def json_array_chunks(items, serialize=None, batch_size=500):
+    """Yield a JSON array piece by piece, `batch_size` items per chunk."""
+    serialize = serialize or (lambda item: item)
+    yield "["
+    batch = []
+    first = True
+    for item in items:
+        batch.append(_dumps(serialize(item)))
+        if len(batch) >= batch_size:
+            yield ("" if first else ",") + ",".join(batch)
+            first = False
+            batch = []
+    if batch:
+        yield ("" if first else ",") + ",".join(batch)
+    yield "]"
+
+
+def stream_json(items, serialize=None, envelope=None, key="results"):
+    """Chunked `{"success": true, "data": {...envelope, key: [items]}}` response.
+
+    Items are serialized while they are consumed, the full list is never
+    built in memory.
+    """
+    def generate():
+        data = _dumps(envelope or {})
+        prefix = data[:-1] + ("," if len(data) > 2 else "")
+        yield '{"success":true,"data":' + prefix + _dumps(key) + ":"
+        yield from json_array_chunks(items, serialize)
+        yield "}}"
+
+    return Response(generate(), mimetype="application/json")
+
+
+def page_response(rows, next_cursor, serialize=None):
+    return stream_json(rows, serialize, envelope={"next_cursor": next_cursor})
+
+
+def stream_query(statement, serialize=None, envelope=None, key="results", engine=None,
+                 batch_size=None):
+    """`stream_json` over the rows of `statement`, read with a server-side cursor.
+
+    The query runs on its own connection, held only while the response is
+    being sent, so a listing of any size never exists as a Python list.
+    """
+    def rows():
+        with (engine or get_engine()).connect() as conn:
+            yield from stream_rows(conn, statement, batch_size)
+
+    return stream_json(rows(), serialize, envelope, key)
@@ -0,0 +1,109 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+
+from framework.columnar import ColumnTable
+
+# Usage, from backend: python -m framework.scripts.benchmark_aggregations [sizes]
+# e.g. python -m framework.scripts.benchmark_aggregations 100000,10000000
+SIZES = [int(size) for size in (sys.argv[1] if len(sys.argv) > 1 else "100000").split(",")]
+BATCH_SIZE = 100000
+
+HAIR = ["auburn", "black", "blonde", "brown", "gray", "red"]
+NATIONALITIES = ["American", "Brazilian", "Canadian", "French", "German", "Mexican", "Nigerian", "Spanish"]
+
+SQL_REPORTS = {
+    "avg_weight_above_70_hair": """
+        SELECT hair_color, AVG(weight_kg) FROM physical
+        GROUP BY hair_color HAVING AVG(weight_kg) > 70
+    """,
+    "avg_weight_nationality_hair": """
+        SELECT nationality, hair_color, AVG(weight_kg) FROM physical
+        GROUP BY nationality, hair_color
+    """,
+    "avg_height_nationality": "SELECT nationality, AVG(height_cm) FROM physical GROUP BY nationality",
+    "avg_height_general": "SELECT AVG(height_cm) FROM physical",
+    "top_oldest_nationality": """
+        SELECT nationality, full_name FROM (
+            SELECT nationality, full_name, ROW_NUMBER() OVER (
+                PARTITION BY nationality ORDER BY age DESC, full_name
+            ) AS position FROM physical
+        ) WHERE position <= 2
+    """,
+}
+
+
+def seed(engine, total):
+    rng = random.Random(42)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE physical (id INTEGER PRIMARY KEY, full_name TEXT, hair_color TEXT, "
+            "nationality TEXT, age INTEGER, height_cm INTEGER, weight_kg INTEGER)"
+        ))
+        for start in range(0, total, BATCH_SIZE):
+            conn.execute(
+                text("INSERT INTO physical VALUES (:id, :full_name, :hair, :nationality, :age, :height, :weight)"),
+                [
+                    {
+                        "id": i,
+                        "full_name": f"Person {i}",
+                        "hair": rng.choice(HAIR),
+                        "nationality": rng.choice(NATIONALITIES),
+                        "age": rng.randint(18, 90),
+                        "height": rng.randint(150, 205),
+                        "weight": rng.randint(45, 110),
+                    }
+                    for i in range(start, min(start + BATCH_SIZE, total))
+                ],
+            )
+
+
+def columnar_reports(table):
+    weights = table.group_means(["weight_kg"], by="hair_color")["weight_kg"]
+    return {
+        "avg_weight_above_70_hair": {hair: weight for hair, weight in weights.items() if weight > 70},
+        "avg_weight_nationality_hair": table.group_means(["weight_kg"], by=["nationality", "hair_color"]),
+        "avg_height_nationality": table.group_means(["height_cm"], by="nationality"),
+        "avg_height_general": table.mean("height_cm"),
+        "top_oldest_nationality": table.top_n("age", by="nationality", n=2, label="full_name"),
+    }
+
+
+def timed(function):
+    started = time.perf_counter()
+    result = function()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def run(total):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'aggregations.db')}")
+        seed(engine, total)
+        with engine.connect() as conn:
+            sql_ms = {
+                name: timed(lambda: conn.execute(text(statement)).all())[1]
+                for name, statement in SQL_REPORTS.items()
+            }
+            table, load_ms = timed(lambda: ColumnTable.from_query(
+                conn,
+                "SELECT full_name, hair_color, nationality, age, height_cm, weight_kg FROM physical",
+                categorical=("full_name", "hair_color", "nationality"),
+            ))
+        _, compute_ms = timed(lambda: columnar_reports(table))
+        engine.dispose()
+
+    print(f"{total} rows")
+    print(f"  SQL, every report per request: {sum(sql_ms.values()):10.1f} ms")
+    for name, elapsed in sql_ms.items():
+        print(f"    {name:<30} {elapsed:10.1f} ms")
+    print(f"  Columnar load (once):          {load_ms:10.1f} ms")
+    print(f"  Columnar, every report:        {compute_ms:10.1f} ms")
+
+
+if __name__ == "__main__":
+    for size in SIZES:
+        run(size)
@@ -0,0 +1,76 @@
+import json
+import os
+import sys
+import time
+
+from sqlalchemy import Column, DateTime, Float, Integer, MetaData, Table, create_engine, func, select
+
+from framework.database import DATABASE_URL
+from framework.ingest import AssignmentCache, LocationIngestor
+
+# Usage, from backend: python -m framework.scripts.benchmark_ingest [pings] [shipments] [lines per request]
+# Uses the framework database unless BENCHMARK_DATABASE_URL is set.
+PINGS = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+SHIPMENTS = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+LINES = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+
+metadata = MetaData()
+shipments = Table(
+    "benchmark_ingest_shipments",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("carrier_id", Integer),
+    Column("latitude", Float),
+    Column("longitude", Float),
+    Column("recorded_at", DateTime),
+)
+history = Table(
+    "benchmark_ingest_locations",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("shipment_id", Integer),
+    Column("latitude", Float),
+    Column("longitude", Float),
+    Column("recorded_at", DateTime),
+)
+
+
+def requests():
+    """NDJSON bodies as a carrier would send them, built before timing."""
+    bodies = []
+    for start in range(0, PINGS, LINES):
+        lines = []
+        for number in range(start, min(start + LINES, PINGS)):
+            lines.append(json.dumps({
+                "shipment_id": number % SHIPMENTS + 1,
+                "latitude": 9.9 + number % 100 / 1000,
+                "longitude": -84.1,
+                "recorded_at": f"2025-01-01T{number // 3600 % 24:02d}:{number // 60 % 60:02d}:{number % 60:02d}",
+            }).encode("utf-8"))
+        bodies.append(lines)
+    return bodies
+
+
+if __name__ == "__main__":
+    engine = create_engine(os.environ.get("BENCHMARK_DATABASE_URL", DATABASE_URL))
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(shipments.insert(), [{"id": i, "carrier_id": 1} for i in range(1, SHIPMENTS + 1)])
+
+    ingestor = LocationIngestor(
+        engine, history, shipments,
+        AssignmentCache(lambda: {i: 1 for i in range(1, SHIPMENTS + 1)}),
+    )
+    bodies = requests()
+    started = time.perf_counter()
+    for lines in bodies:
+        accepted, errors = ingestor.submit(1, lines)
+        assert not errors, errors[:3]
+    ingestor.stop()
+    elapsed = time.perf_counter() - started
+
+    with engine.connect() as conn:
+        written = conn.execute(select(func.count()).select_from(history)).scalar()
+    metadata.drop_all(engine)
+    print(f"{engine.dialect.name}: {written} pings in {elapsed:.2f} s ({written / elapsed:.0f} pings/s)")
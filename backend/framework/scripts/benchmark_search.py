@@ -0,0 +1,66 @@
+import random
+import sys
+import time
+
+from framework.search import InvertedIndex
+
+# Usage, from backend: python -m framework.scripts.benchmark_search [people] [queries]
+PEOPLE = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+QUERIES = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+# Same attributes as the session_2 /people/find filters, cardinalities close to
+# the sample CSV files.
+ATTRIBUTES = {
+    "eye_color": ["blue", "brown", "green", "hazel", "gray"],
+    "hair_color": ["auburn", "black", "blonde", "brown", "gray", "red"],
+    "age": list(range(18, 80)),
+    "height_cm": list(range(150, 205)),
+    "weight_kg": list(range(50, 100)),
+    "nationality": ["American", "Brazilian", "Canadian", "French", "German", "Mexican", "Nigerian", "Spanish"],
+    "degree": ["High School", "Bachelor's", "Master's", "PhD", "Certificate"],
+    "institution": ["MIT", "Stanford", "Harvard", "University of Tokyo", "Oxford", "Cambridge"],
+    "hobby": ["chess", "dancing", "gaming", "hiking", "painting", "reading", "swimming", "cooking"],
+    "food": ["curry", "lasagna", "pasta", "pizza", "ramen", "salad", "sushi", "tacos"],
+    "family": ["aunt", "brother", "cousin", "father", "mother", "sister", "uncle"],
+}
+MULTI_VALUED = {"hobby": 3, "food": 2, "family": 3}
+
+
+def build():
+    rng = random.Random(42)
+    index = InvertedIndex(ATTRIBUTES)
+    for person_id in range(1, PEOPLE + 1):
+        for attribute, values in ATTRIBUTES.items():
+            for _ in range(MULTI_VALUED.get(attribute, 1)):
+                index.add(person_id, attribute, rng.choice(values))
+    return index
+
+
+def random_filters(rng):
+    attributes = rng.sample(sorted(ATTRIBUTES), rng.randint(2, 6))
+    return {attribute: rng.choice(ATTRIBUTES[attribute]) for attribute in attributes}
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    index = build()
+    print(f"Indexed {PEOPLE} people in {time.perf_counter() - started:.1f} s")
+
+    started = time.perf_counter()
+    index.prepare()
+    print(f"Built the posting arrays in {time.perf_counter() - started:.1f} s")
+
+    for method in ("find_ids", "find"):
+        rng = random.Random(7)
+        timings = []
+        matches = 0
+        for _ in range(QUERIES):
+            filters = random_filters(rng)
+            started = time.perf_counter()
+            matches += len(getattr(index, method)(filters))
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        print(
+            f"{method:8} | {QUERIES} queries | avg matches {matches / QUERIES:.0f} | "
+            f"p50 {timings[len(timings) // 2]:.3f} ms | p99 {timings[int(len(timings) * 0.99) - 1]:.3f} ms"
+        )
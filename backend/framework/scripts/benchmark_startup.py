@@ -0,0 +1,73 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# What each boot imports before it can do its first piece of work.
+TARGETS = {
+    # A gunicorn worker: the framework plus the selected contributor app.
+    "worker": (
+        "from framework.server import app_path, load_app; "
+        "load_app(app_path(os.environ.get('APPLICATION_FOLDER') or 'capdevcr/motivation'))"
+    ),
+    # The test harness before the first migration runs.
+    "harness": "import alembic.command, alembic.config, framework.models, framework.settings",
+}
+STARTUP_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", "1000"))
+
+
+def measure(code, runs):
+    """Best wall time of `runs` fresh interpreters and the -X importtime report."""
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR)
+    best = None
+    report = ""
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import os; {code}"],
+            capture_output=True, text=True, env=env, check=True,
+        )
+        elapsed = (time.perf_counter() - started) * 1000
+        if best is None or elapsed < best:
+            best, report = elapsed, result.stderr
+    return best, report
+
+
+def slowest_imports(report, limit):
+    """Top-level imports sorted by cumulative time, as `(ms, module)`."""
+    imports = []
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented under the module that triggered them.
+        if not name.startswith("  "):
+            imports.append((int(cumulative) / 1000, name.strip()))
+    return sorted(imports, reverse=True)[:limit]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure boot time with python -X importtime.")
+    parser.add_argument("targets", nargs="*", help=f"any of {', '.join(TARGETS)} (default: all)")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=8)
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    args = parser.parse_args()
+    unknown = set(args.targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(sorted(unknown))}")
+
+    over_budget = []
+    for target in args.targets or TARGETS:
+        elapsed, report = measure(TARGETS[target], args.runs)
+        print(f"{target}: {elapsed:.0f} ms (budget {args.budget_ms:.0f} ms)")
+        for ms, module in slowest_imports(report, args.top):
+            print(f"  {ms:8.1f} ms  {module}")
+        if elapsed > args.budget_ms:
+            over_budget.append(target)
+    if over_budget:
+        print(f"Over budget: {', '.join(over_budget)}")
+    sys.exit(1 if over_budget else 0)
@@ -0,0 +1,87 @@
+import os
+import random
+import sys
+import threading
+import time
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, select
+
+from framework.database import DATABASE_URL
+from framework.state_machine import StateMachine
+
+# Usage, from backend: python -m framework.scripts.benchmark_transitions [writers] [updates per writer] [rows]
+# Uses the framework database unless BENCHMARK_DATABASE_URL is set.
+WRITERS = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+UPDATES = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+ROWS = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+
+metadata = MetaData()
+shipments = Table(
+    "benchmark_shipments",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("status", String, nullable=False),
+    Column("location", String),
+    Column("version", Integer, nullable=False),
+)
+machine = StateMachine(shipments, {"In Transit": {"In Transit"}})
+
+
+def writer(engine, number, applied, retries, lock):
+    rng = random.Random(number)
+    for update in range(UPDATES):
+        item_id = rng.randint(1, ROWS)
+        # Optimistic loop: read the version, write only if nobody else did.
+        while True:
+            with engine.begin() as conn:
+                version = conn.execute(
+                    select(shipments.c.version).where(shipments.c.id == item_id)
+                ).scalar()
+                row = machine.transition(
+                    conn, item_id, "In Transit", expected="In Transit", version=version,
+                    values={"location": f"writer {number} update {update}"},
+                )
+            if row is not None:
+                with lock:
+                    applied[item_id] += 1
+                break
+            retries[number] += 1
+
+
+if __name__ == "__main__":
+    url = os.environ.get("BENCHMARK_DATABASE_URL", DATABASE_URL)
+    if url.startswith("sqlite"):
+        engine = create_engine(url, connect_args={"timeout": 60})
+    else:
+        engine = create_engine(url, pool_size=WRITERS, max_overflow=0)
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(shipments.insert(), [
+            {"id": i, "status": "In Transit", "version": 0} for i in range(1, ROWS + 1)
+        ])
+
+    applied = {i: 0 for i in range(1, ROWS + 1)}
+    retries = [0] * WRITERS
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(target=writer, args=(engine, number, applied, retries, lock))
+        for number in range(WRITERS)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with engine.connect() as conn:
+        versions = dict(conn.execute(select(shipments.c.id, shipments.c.version)).all())
+    metadata.drop_all(engine)
+
+    lost = {item_id: applied[item_id] - versions[item_id] for item_id in applied if applied[item_id] != versions[item_id]}
+    total = WRITERS * UPDATES
+    print(f"{WRITERS} writers, {total} updates on {ROWS} rows in {elapsed:.2f} s ({total / elapsed:.0f}/s)")
+    print(f"Conflicts retried: {sum(retries)}")
+    print("Lost updates: none" if not lost else f"Lost updates: {lost}")
+    sys.exit(1 if lost else 0)
@@ -1,28 +1,106 @@
+import contextlib
 import os
-import subprocess
+import runpy
+import sys
+import time
 
-def run_alembic_upgrade(path):
-    print(f"Running alembic upgrade head in {path}")
-    subprocess.run(["alembic", "upgrade", "head"], cwd=path, check=True)
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+FRAMEWORK_DIR = os.path.join(BACKEND_DIR, "framework")
+
+
+def version_table(path):
+    # The framework keeps alembic's default table, apps use their own (see the
+    # boilerplate env.py) so both histories live in one database.
+    return "alembic_version" if path == FRAMEWORK_DIR else "alembic_version_app"
+
+
+@contextlib.contextmanager
+def app_imports(path):
+    """Run with `path` as working directory and first on sys.path, like
+    `alembic` and `python seeds.py` did when they ran as subprocesses there."""
+    saved = list(sys.path)
+    sys.path.insert(0, path)
+    try:
+        with contextlib.chdir(path):
+            yield
+    finally:
+        sys.path[:] = saved
+
+
+def run_alembic_upgrade(path, connection):
+    """Upgrade the alembic project in `path` to head on `connection`.
+
+    Returns False without loading env.py when the database is already at head.
+    """
+    from alembic import command
+    from alembic.config import Config
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    with app_imports(path):
+        config = Config(os.path.join(path, "alembic.ini"))
+        heads = set(ScriptDirectory.from_config(config).get_heads())
+        context = MigrationContext.configure(connection, opts={"version_table": version_table(path)})
+        current = set(context.get_current_heads())
+        # Don't hold a read transaction open while env.py writes.
+        connection.commit()
+        if current == heads:
+            print(f"{path} is already at head")
+            return False
+        print(f"Running alembic upgrade head in {path}")
+        # env.py migrates on this connection instead of opening its own engine.
+        config.attributes["connection"] = connection
+        command.upgrade(config, "head")
+        connection.commit()
+    return True
 
-if __name__ == "__main__":
-    framework_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-    run_alembic_upgrade(framework_dir)
 
-    # Run seeds.py in framework
-    seeds_path = os.path.join(framework_dir, "seeds.py")
-    if os.path.exists(seeds_path):
-        print(f"Running seeds.py in {framework_dir}")
-        subprocess.run(["python", seeds_path], check=True)
+def run_seeds(path):
+    seeds_path = os.path.join(path, "seeds.py")
+    if not os.path.exists(seeds_path):
+        return False
+    print(f"Running seeds.py in {path}")
+    with app_imports(path):
+        runpy.run_path(seeds_path, run_name="__main__")
+    return True
 
+
+def populate():
+    """Migrate and seed the framework, then the APPLICATION_FOLDER app, in process.
+
+    Migrations share one connection and seeds go through the framework engine,
+    so the whole run pays for one interpreter, one SQLAlchemy import and one
+    pool instead of a subprocess per step. Prints how long each step took.
+    """
+    from framework.database import get_engine
+
+    folders = [("framework", FRAMEWORK_DIR)]
     app_folder = os.environ.get("APPLICATION_FOLDER")
     if app_folder:
-        app_folder_path = os.path.join(framework_dir, "..", "contributors", app_folder)
-        alembic_ini_path = os.path.join(app_folder_path, "alembic.ini")
-        if os.path.exists(alembic_ini_path):
-            run_alembic_upgrade(app_folder_path)
-        # Run seeds.py in APPLICATION_FOLDER if it exists
-        app_seeds_path = os.path.join(app_folder_path, "seeds.py")
-        if os.path.exists(app_seeds_path):
-            print(f"Running seeds.py in {app_folder_path}")
-            subprocess.run(["python", app_seeds_path], check=True)
+        folders.append((app_folder, os.path.join(BACKEND_DIR, "contributors", app_folder)))
+
+    engine = get_engine()
+    timings = []
+    started = time.perf_counter()
+    with engine.connect() as connection:
+        for name, path in folders:
+            if os.path.exists(os.path.join(path, "alembic.ini")):
+                step_started = time.perf_counter()
+                ran = run_alembic_upgrade(path, connection)
+                timings.append((f"{name} migrations", time.perf_counter() - step_started, ran))
+            step_started = time.perf_counter()
+            ran = run_seeds(path)
+            timings.append((f"{name} seeds", time.perf_counter() - step_started, ran))
+    # Callers may drop or clone the database next, don't leave sessions behind.
+    engine.dispose()
+
+    print(f"Populated database in {time.perf_counter() - started:.2f} s")
+    for name, elapsed, ran in timings:
+        print(f"  {name:<40} {elapsed * 1000:8.1f} ms{'' if ran else '  (skipped)'}")
+    return timings
+
+
+if __name__ == "__main__":
+    populate()
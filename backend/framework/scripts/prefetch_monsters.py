@@ -0,0 +1,73 @@
+import argparse
+import os
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from framework.http_cache import UPSTREAM_TIMEOUT, UpstreamCache, save_snapshot
+
+BASE_URL = os.environ.get("DND_API_URL", "https://www.dnd5eapi.co/api/2014")
+SNAPSHOT_PATH = os.environ.get(
+    "MONSTER_SNAPSHOT_PATH",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "snapshots", "monsters.json.gz")),
+)
+
+
+def http_session(workers):
+    # One keep-alive pool shared by every worker thread.
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers, max_retries=3)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Accept"] = "application/json"
+    return session
+
+
+def prefetch(base_url, resource, workers):
+    session = http_session(workers)
+    listing = session.get(f"{base_url}/{resource}", timeout=UPSTREAM_TIMEOUT)
+    listing.raise_for_status()
+    listing = listing.json()
+    indexes = [item["index"] for item in listing["results"]]
+
+    def fetch(index):
+        response = session.get(f"{base_url}/{resource}/{index}", timeout=UPSTREAM_TIMEOUT)
+        response.raise_for_status()
+        return resource, index, response.json()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        details = list(pool.map(fetch, indexes))
+    return [(resource, "", listing)] + details
+
+
+def measure(path):
+    tracemalloc.start()
+    started = time.perf_counter()
+    cache = UpstreamCache(BASE_URL, session_factory=None, snapshot=path)
+    elapsed = (time.perf_counter() - started) * 1000
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"Cold start: {len(cache.memory)} entries in {elapsed:.1f} ms, "
+        f"{current / 1024 / 1024:.1f} MiB resident, {peak / 1024 / 1024:.1f} MiB peak"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download an upstream resource into a warm-start snapshot.")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--resource", default="monsters")
+    parser.add_argument("--output", default=SNAPSHOT_PATH)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--measure-only", action="store_true", help="only time loading an existing snapshot")
+    args = parser.parse_args()
+
+    if not args.measure_only:
+        started = time.perf_counter()
+        entries = prefetch(args.base_url, args.resource, args.workers)
+        total = save_snapshot(args.output, args.base_url, entries)
+        print(f"Saved {total} entries to {args.output} in {time.perf_counter() - started:.1f} s")
+    measure(args.output)
@@ -1,20 +1,29 @@
-
+import argparse
+import glob
+import hashlib
 import os
-import subprocess
+import shutil
+import sys
+import time
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.exc import ProgrammingError
 from sqlite3 import OperationalError
 
-user = os.environ.get("POSTGRES_USER", "postgres")
-password = os.environ.get("POSTGRES_PASSWORD", "postgres")
-host = os.environ.get("POSTGRES_HOST", "localhost")
-port = os.environ.get("POSTGRES_PORT", "5432")
-db = os.environ.get("POSTGRES_DB", "postgres")
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+sys.path.insert(0, BACKEND_DIR)
+from framework.scripts.populate_database import populate
+from framework.settings import settings
+
+RESET_SNAPSHOT = os.environ.get("RESET_SNAPSHOT", "1") == "1"
+# Where SQLite snapshots are kept, next to the database file by default.
+RESET_SNAPSHOT_DIR = os.environ.get("RESET_SNAPSHOT_DIR", "")
+# Seed data read by the loaders, hashed into the snapshot key.
+SEED_DATA_EXTENSIONS = ("csv", "tsv", "json", "jsonl", "ndjson")
 
-DATABASE_URL = f"postgresql+psycopg://{user}:{password}@{host}:{port}/{db}"
 
 def reset_database():
-    engine = create_engine(DATABASE_URL, isolation_level="AUTOCOMMIT")
+    engine = create_engine(settings.database_url, isolation_level="AUTOCOMMIT")
     try:
         with engine.connect() as conn:
             conn.execute(text("DROP SCHEMA IF EXISTS public CASCADE;"))
@@ -27,27 +36,146 @@ def reset_database():
     except Exception as e:
         print(f"Uncaught exception: {e}")
 
-def run_alembic_upgrade(path):
-    print(f"Running alembic upgrade head in {path}")
-    subprocess.run(["alembic", "upgrade", "head"], cwd=path, check=True)
 
-if __name__ == "__main__":
-    reset_database()
-    framework_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-    run_alembic_upgrade(framework_dir)
+def snapshot_sources(app_folder=None):
+    """Files whose contents decide what a freshly populated database holds.
+
+    That is the migrations, the seeds and what they import: the framework's
+    seeding, loaders and models, the app's package (its models) and the data
+    files found anywhere in the app folder.
+    """
+    framework = os.path.join(BACKEND_DIR, "framework")
+    folders = [framework]
+    sources = [os.path.join(framework, name) for name in ("seeding.py", "loaders.py", "models.py")]
+    if app_folder:
+        app = os.path.join(BACKEND_DIR, "contributors", app_folder)
+        folders.append(app)
+        sources += sorted(glob.glob(os.path.join(app, "app", "**", "*.py"), recursive=True))
+        for extension in SEED_DATA_EXTENSIONS:
+            sources += sorted(glob.glob(os.path.join(app, "**", f"*.{extension}"), recursive=True))
+    for folder in folders:
+        sources += sorted(glob.glob(os.path.join(folder, "alembic", "versions", "*.py")))
+        sources.append(os.path.join(folder, "seeds.py"))
+    return [path for path in sources if os.path.exists(path)]
+
+
+def snapshot_key(app_folder=None):
+    """Hash of every `snapshot_sources` file, so any change makes a new snapshot."""
+    digest = hashlib.sha256((app_folder or "").encode("utf-8"))
+    for path in snapshot_sources(app_folder):
+        digest.update(os.path.relpath(path, BACKEND_DIR).encode("utf-8"))
+        with open(path, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()[:12]
+
+
+def _sqlite_snapshot(database, app_folder, key):
+    # One snapshot per app, so test runs of several apps can share the folder.
+    folder = RESET_SNAPSHOT_DIR or os.path.dirname(database)
+    tag = (app_folder or "framework").replace("/", "__")
+    return os.path.join(folder, f"{os.path.basename(database)}.{tag}.{key}.snapshot")
+
+
+def _remove_sqlite(database):
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(database + suffix):
+            os.remove(database + suffix)
+
+
+def reset_sqlite(database, app_folder, key):
+    """Copy the snapshot over the database file, building it first if needed."""
+    snapshot = _sqlite_snapshot(database, app_folder, key)
+    _remove_sqlite(database)
+    if os.path.exists(snapshot):
+        shutil.copyfile(snapshot, database)
+        return True
+    populate()
+    os.makedirs(os.path.dirname(snapshot), exist_ok=True)
+    # Copy then rename, a reset running next to this one never sees half a file.
+    shutil.copyfile(database, snapshot + ".tmp")
+    os.replace(snapshot + ".tmp", snapshot)
+    for stale in glob.glob(_sqlite_snapshot(database, app_folder, "*")):
+        if stale != snapshot:
+            os.remove(stale)
+    return False
 
-    seeds_path = os.path.join(framework_dir, "seeds.py")
-    if os.path.exists(seeds_path):
-        print(f"Running seeds.py in {framework_dir}")
-        subprocess.run(["python", seeds_path], check=True)
 
+def _drop_connections(conn, database):
+    conn.execute(
+        text(
+            "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+            "WHERE datname = :database AND pid <> pg_backend_pid()"
+        ),
+        {"database": database},
+    )
+
+
+def admin_database(database):
+    """Database the drop and clone statements run from, never the target:
+    `postgres`, or `template1` when the target is `postgres` itself."""
+    return "template1" if database == "postgres" else "postgres"
+
+
+def reset_postgres(url, key):
+    """Clone the database from a template snapshot, building it first if needed.
+
+    The snapshot is a database named `<db>_snap_<key>`; `CREATE DATABASE ...
+    TEMPLATE` copies it file by file, which takes well under a second for a
+    bootcamp sized schema. Statements run from `admin_database()` because the
+    target itself is dropped.
+    """
+    database = url.database
+    snapshot = f"{database}_snap_{key}"
+    admin = create_engine(url.set(database=admin_database(database)), isolation_level="AUTOCOMMIT")
+    try:
+        with admin.connect() as conn:
+            exists = conn.execute(
+                text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": snapshot}
+            ).scalar()
+            if exists:
+                _drop_connections(conn, database)
+                conn.execute(text(f'DROP DATABASE IF EXISTS "{database}"'))
+                conn.execute(text(f'CREATE DATABASE "{database}" TEMPLATE "{snapshot}"'))
+                return True
+
+        reset_database()
+        populate()
+        with admin.connect() as conn:
+            # A template can't have other sessions while it is copied.
+            _drop_connections(conn, database)
+            conn.execute(text(f'CREATE DATABASE "{snapshot}" TEMPLATE "{database}"'))
+            stale = conn.execute(
+                text("SELECT datname FROM pg_database WHERE datname LIKE :prefix AND datname <> :name"),
+                {"prefix": f"{database}\\_snap\\_%", "name": snapshot},
+            ).scalars().all()
+            for name in stale:
+                conn.execute(text(f'DROP DATABASE IF EXISTS "{name}"'))
+        return False
+    finally:
+        admin.dispose()
+
+
+def reset(snapshot=RESET_SNAPSHOT):
+    """Empty, migrated and seeded database, restored from a snapshot when possible."""
+    started = time.perf_counter()
+    if not snapshot:
+        reset_database()
+        populate()
+        print(f"Database rebuilt in {time.perf_counter() - started:.2f} s")
+        return
     app_folder = os.environ.get("APPLICATION_FOLDER")
-    if app_folder:
-        app_folder_path = os.path.join(framework_dir, "..", "contributors", app_folder)
-        alembic_ini_path = os.path.join(app_folder_path, "alembic.ini")
-        if os.path.exists(alembic_ini_path):
-            run_alembic_upgrade(app_folder_path)
-        app_seeds_path = os.path.join(app_folder_path, "seeds.py")
-        if os.path.exists(app_seeds_path):
-            print(f"Running seeds.py in {app_folder_path}")
-            subprocess.run(["python", app_seeds_path], check=True)
+    key = snapshot_key(app_folder)
+    url = make_url(settings.database_url)
+    if url.get_backend_name() == "sqlite":
+        restored = reset_sqlite(url.database, app_folder, key)
+    else:
+        restored = reset_postgres(url, key)
+    action = "restored from" if restored else "rebuilt into"
+    print(f"Database {action} snapshot {key} in {time.perf_counter() - started:.2f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reset the database to migrated and seeded.")
+    parser.add_argument("--no-snapshot", action="store_true", help="always migrate and seed from scratch")
+    args = parser.parse_args()
+    reset(snapshot=RESET_SNAPSHOT and not args.no_snapshot)
@@ -0,0 +1,245 @@
+import threading
+import numpy as np
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+
+def normalize(value):
+    return str(value).strip().lower()
+
+
+class _Posting:
+    """Ids of one (attribute, value): a count of the rows behind each id, and
+    for searching the ids as a sorted int32 array and as a bitset, both
+    rebuilt on first use after a change."""
+
+    __slots__ = ("counts", "_ids", "_bits")
+
+    def __init__(self):
+        self.counts = {}
+        self._ids = None
+        self._bits = None
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __contains__(self, item_id):
+        return item_id in self.counts
+
+    def add(self, item_id):
+        self.counts[item_id] = self.counts.get(item_id, 0) + 1
+        self._ids = self._bits = None
+
+    def discard(self, item_id, rows=1):
+        if item_id not in self.counts:
+            return
+        self.counts[item_id] -= rows
+        if self.counts[item_id] <= 0:
+            del self.counts[item_id]
+        self._ids = self._bits = None
+
+    def ids(self):
+        if self._ids is None:
+            ids = np.fromiter(self.counts, dtype=np.int32, count=len(self.counts))
+            ids.sort()
+            # find_ids hands this array out as is.
+            ids.flags.writeable = False
+            self._ids = ids
+        return self._ids
+
+    def bits(self):
+        if self._bits is None:
+            ids = self.ids()
+            present = np.zeros(int(ids[-1]) + 1 if len(ids) else 0, dtype=bool)
+            present[ids] = True
+            self._bits = np.packbits(present)
+        return self._bits
+
+
+_NO_IDS = np.empty(0, dtype=np.int32)
+_BIT_MASKS = np.array([128, 64, 32, 16, 8, 4, 2, 1], dtype=np.uint8)
+
+
+def _keep_present(candidates, posting):
+    # One bit lookup per candidate, so the cost follows the candidates and not
+    # the size of the posting, unlike np.intersect1d which sorts both.
+    bits = posting.bits()
+    candidates = candidates[:np.searchsorted(candidates, len(bits) * 8)]
+    return candidates[(bits[candidates >> 3] & _BIT_MASKS[candidates & 7]) != 0]
+
+
+class InvertedIndex:
+    """In-memory posting lists of ids per (attribute, value).
+
+    A search intersects the posting list of every filter starting with the
+    rarest one, so the cost depends on the smallest match and not on how many
+    rows the child tables have. Postings are searched as sorted int32 arrays
+    and bitsets, so ids must be integers. Each posting counts the rows behind an id (a person with two
+    "brother" rows), so removing one of them keeps the id.
+    """
+
+    def __init__(self, attributes=None):
+        self._postings = {attribute: {} for attribute in attributes or []}
+        self._lock = threading.RLock()
+
+    @property
+    def attributes(self):
+        return set(self._postings)
+
+    def add(self, item_id, attribute, value):
+        if value is None:
+            return
+        with self._lock:
+            values = self._postings.setdefault(attribute, {})
+            values.setdefault(normalize(value), _Posting()).add(item_id)
+
+    def remove(self, item_id, attribute, value):
+        if value is None:
+            return
+        with self._lock:
+            values = self._postings.get(attribute, {})
+            key = normalize(value)
+            posting = values.get(key)
+            if posting is None:
+                return
+            posting.discard(item_id)
+            if not posting:
+                del values[key]
+
+    def remove_item(self, item_id):
+        with self._lock:
+            for values in self._postings.values():
+                for key in [key for key, posting in values.items() if item_id in posting]:
+                    posting = values[key]
+                    posting.discard(item_id, rows=posting.counts[item_id])
+                    if not posting:
+                        del values[key]
+
+    def count(self, attribute, value):
+        return len(self._postings.get(attribute, {}).get(normalize(value), ()))
+
+    def find_ids(self, filters):
+        """Sorted int32 array of the ids matching every `attribute: value` filter.
+
+        Use it over `find` for large results, e.g. to page through them or to
+        pass them on to an `IN`, it builds no Python objects.
+        """
+        unknown = set(filters) - self.attributes
+        if unknown:
+            raise ValueError(f"Unknown filters: {', '.join(sorted(unknown))}")
+        with self._lock:
+            postings = []
+            for attribute, value in filters.items():
+                posting = self._postings[attribute].get(normalize(value))
+                if posting is None:
+                    return _NO_IDS
+                postings.append(posting)
+            if not postings:
+                return _NO_IDS
+            postings.sort(key=len)
+            if len(postings) > 1 and len(postings[0]) * 2 > len(postings[0].bits()):
+                # One id in sixteen is set even in the rarest posting:
+                # AND the whole bitsets, decoding them once is cheaper than
+                # a lookup per candidate.
+                bitsets = [posting.bits() for posting in postings]
+                size = min(len(bits) for bits in bitsets)
+                matched = bitsets[0][:size].copy()
+                for bits in bitsets[1:]:
+                    matched &= bits[:size]
+                return np.flatnonzero(np.unpackbits(matched).view(bool)).astype(np.int32)
+            # Candidates come from the rarest posting and only shrink from there.
+            result = postings[0].ids()
+            for posting in postings[1:]:
+                if not len(result):
+                    break
+                result = _keep_present(result, posting)
+            return result
+
+    def find(self, filters):
+        """Return the set of ids matching every `attribute: value` filter."""
+        return set(self.find_ids(filters).tolist())
+
+    def prepare(self):
+        """Build the search arrays of every posting now instead of on the first
+        search that needs them, e.g. right after filling the index."""
+        with self._lock:
+            for values in self._postings.values():
+                for posting in values.values():
+                    posting.bits()
+        return self
+
+    def load(self, conn, sources):
+        """Fill the index from the database.
+
+        `sources` maps an attribute to `(table_or_model, id_column, value_column)`,
+        e.g. `{"hobby": (Hobby, "person_id", "hobby")}`.
+        """
+        for attribute, (table, id_column, value_column) in sources.items():
+            table = getattr(table, "__table__", table)
+            self._postings.setdefault(attribute, {})
+            rows = conn.execute(select(table.c[id_column], table.c[value_column]))
+            for item_id, value in rows:
+                self.add(item_id, attribute, value)
+        return self.prepare()
+
+    def track(self, model, attribute, id_field, value_field):
+        """Keep `attribute` in sync with ORM writes on `model`.
+
+        Changes are collected per session and applied only after commit.
+        """
+        self._postings.setdefault(attribute, {})
+
+        # Load the old value on assignment even when the attribute was expired,
+        # otherwise after_update cannot tell which posting to remove.
+        for field in (id_field, value_field):
+            event.listen(getattr(model, field), "set", _keep_old_value, active_history=True)
+
+        def queue(target, operation, item_id, value):
+            session = Session.object_session(target)
+            if session is None:
+                return
+            pending = session.info.setdefault("search_index_ops", [])
+            pending.append((self, operation, item_id, attribute, value))
+
+        @event.listens_for(model, "after_insert")
+        def after_insert(mapper, connection, target):
+            queue(target, "add", getattr(target, id_field), getattr(target, value_field))
+
+        @event.listens_for(model, "after_delete")
+        def after_delete(mapper, connection, target):
+            state = inspect(target)
+            item_id = _previous(state, id_field)
+            queue(target, "remove", item_id, _previous(state, value_field))
+
+        @event.listens_for(model, "after_update")
+        def after_update(mapper, connection, target):
+            state = inspect(target)
+            old_id, old_value = _previous(state, id_field), _previous(state, value_field)
+            new_id, new_value = getattr(target, id_field), getattr(target, value_field)
+            if (old_id, old_value) != (new_id, new_value):
+                queue(target, "remove", old_id, old_value)
+                queue(target, "add", new_id, new_value)
+
+        return self
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    return value
+
+
+def _previous(state, field):
+    history = state.attrs[field].history
+    if history.deleted:
+        return history.deleted[0]
+    return state.attrs[field].value
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_index_changes(session):
+    for index, operation, item_id, attribute, value in session.info.pop("search_index_ops", []):
+        getattr(index, operation)(item_id, attribute, value)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_index_changes(session):
+    session.info.pop("search_index_ops", None)
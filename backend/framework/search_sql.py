@@ -0,0 +1,75 @@
+from sqlalchemy import exists, select, text
+
+
+def _table(table):
+    return getattr(table, "__table__", table)
+
+
+def exists_filter(parent_id, table, fk_column, value_column, value):
+    """`EXISTS (SELECT 1 FROM table WHERE fk = parent.id AND column = value)`."""
+    table = _table(table)
+    return exists().where(
+        table.c[fk_column] == parent_id,
+        table.c[value_column] == value,
+    )
+
+
+def build_search(parent, filters, sources, columns=None, id_column="id"):
+    """Select `columns` of `parent` rows matching every filter.
+
+    Each filter becomes a semi-join against its own table, so a person with
+    three hobbies and two favorite foods still comes back once and the planner
+    can probe the (value, fk) index of every table independently.
+    `sources` maps a filter name to `(table_or_model, fk_column, value_column)`.
+    """
+    parent = _table(parent)
+    unknown = set(filters) - set(sources)
+    if unknown:
+        raise ValueError(f"Unknown filters: {', '.join(sorted(unknown))}")
+    parent_id = parent.c[id_column]
+    statement = select(*(columns or [parent]))
+    for name, value in filters.items():
+        table, fk_column, value_column = sources[name]
+        statement = statement.where(
+            exists_filter(parent_id, table, fk_column, value_column, value)
+        )
+    return statement.order_by(parent_id)
+
+
+def search_indexes(sources):
+    """Yield `(index_name, table_name, columns)` for every filter source."""
+    seen = set()
+    for table, fk_column, value_column in sources.values():
+        table = _table(table)
+        name = f"ix_{table.name}_{value_column}_{fk_column}"
+        if name in seen:
+            continue
+        seen.add(name)
+        yield name, table.name, [value_column, fk_column]
+
+
+def create_search_indexes(op, sources):
+    """Create the composite indexes `build_search` relies on, from a migration."""
+    for name, table_name, columns in search_indexes(sources):
+        op.create_index(name, table_name, columns)
+
+
+def drop_search_indexes(op, sources):
+    for name, table_name, _ in search_indexes(sources):
+        op.drop_index(name, table_name=table_name)
+
+
+def explain(conn, statement):
+    """Return the Postgres plan of `statement` as the JSON tree of EXPLAIN."""
+    compiled = statement.compile(conn, compile_kwargs={"literal_binds": True})
+    return conn.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar()[0]["Plan"]
+
+
+def seq_scanned_tables(plan):
+    """Names of the relations a plan reads with a sequential scan."""
+    tables = []
+    if plan.get("Node Type") == "Seq Scan":
+        tables.append(plan.get("Relation Name"))
+    for child in plan.get("Plans", []):
+        tables.extend(seq_scanned_tables(child))
+    return tables
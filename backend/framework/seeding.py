@@ -0,0 +1,66 @@
+import hashlib
+import json
+import os
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from framework.database import get_engine
+from framework.loaders import applied_hash, record_seed
+from framework.reports import invalidate_tables
+
+SEED_BATCH_SIZE = int(os.environ.get("SEED_BATCH_SIZE", "1000"))
+
+_conflict_inserts = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def rows_hash(rows):
+    payload = json.dumps(rows, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+def insert_statement(conn, table, skip_conflicts=True):
+    build = _conflict_inserts.get(conn.dialect.name)
+    if skip_conflicts and build is not None:
+        return build(table).on_conflict_do_nothing()
+    return insert(table)
+
+
+def insert_batches(conn, table, rows, batch_size=None, skip_conflicts=True):
+    """Insert `rows` in multi-row batches, returns how many were inserted.
+
+    Rows skipped on a conflict are not counted.
+    """
+    batch_size = batch_size or SEED_BATCH_SIZE
+    statement = insert_statement(conn, table, skip_conflicts)
+    total = 0
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        result = conn.execute(statement.values(batch))
+        # -1 when the driver can't tell, then every row of the batch counts.
+        total += result.rowcount if result.rowcount >= 0 else len(batch)
+    return total
+
+
+def seed(name, table, rows, engine=None, batch_size=None, skip_conflicts=True):
+    """Insert `rows` (a list of dicts) into `table` once.
+
+    The seed is recorded in seed_log under `name` with a hash of its rows, an
+    unchanged seed is skipped without touching the table. Rows are inserted in
+    multi-row batches and, on Postgres and SQLite, rows hitting a unique
+    constraint are ignored so a changed seed only adds what is new.
+    """
+    engine = engine or get_engine()
+    table = getattr(table, "__table__", table)
+    rows = list(rows)
+    content_hash = rows_hash(rows)
+    with engine.begin() as conn:
+        if applied_hash(conn, name) == content_hash:
+            print(f"Skipping seed {name}, already applied.")
+            return 0
+        total = insert_batches(conn, table, rows, batch_size, skip_conflicts)
+        record_seed(conn, name, content_hash)
+        invalidate_tables(conn, [table.name])
+    print(f"Seeded {total} of {len(rows)} rows into {table.name} ({name}).")
+    return total
@@ -1,6 +1,6 @@
 
-from models import MotivationalPhrase
-from database import get_session
+from framework.models import MotivationalPhrase
+from framework.seeding import seed
 
 phrases = [
     "Believe in yourself!",
@@ -16,12 +16,7 @@ phrases = [
 ]
 
 def seed_motivational_phrases():
-    session = get_session()
-    for phrase in phrases:
-        session.add(MotivationalPhrase(phrase=phrase))
-    session.commit()
-    session.close()
-    print("Seeded motivational phrases.")
+    seed("motivational_phrases", MotivationalPhrase, [{"phrase": phrase} for phrase in phrases])
 
 if __name__ == "__main__":
     seed_motivational_phrases()
@@ -0,0 +1,100 @@
+import gc
+import importlib.util
+import os
+import sys
+
+from gunicorn.app.base import BaseApplication
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+APPLICATION_FOLDER = os.environ.get("APPLICATION_FOLDER", "capdevcr/motivation")
+WEB_HOST = os.environ.get("WEB_HOST", "0.0.0.0")
+WEB_PORT = int(os.environ.get("WEB_PORT", "4000"))
+# Same default as .env.example; (2 x CPUs) + 1 is the usual ceiling.
+WEB_WORKERS = int(os.environ.get("WEB_WORKERS", "2"))
+WEB_THREADS = int(os.environ.get("WEB_THREADS", "4"))
+WEB_TIMEOUT = int(os.environ.get("WEB_TIMEOUT", "30"))
+WEB_GRACEFUL_TIMEOUT = int(os.environ.get("WEB_GRACEFUL_TIMEOUT", "30"))
+WEB_MAX_REQUESTS = int(os.environ.get("WEB_MAX_REQUESTS", "0"))
+SERVER_RELOAD = os.environ.get("SERVER_RELOAD", "0") == "1"
+
+
+def app_path(folder=None):
+    return os.path.join(BACKEND_DIR, "contributors", folder or APPLICATION_FOLDER, "main.py")
+
+
+def load_app(path=None):
+    """Import the contributor's main.py and return its Flask `app`."""
+    path = path or app_path()
+    sys.path.insert(0, os.path.dirname(path))
+    spec = importlib.util.spec_from_file_location("main", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["main"] = module
+    spec.loader.exec_module(module)
+    return module.app
+
+
+def _worker_exit(server, worker):
+    # Close this worker's pooled connections so Postgres sees a clean
+    # disconnect instead of a dropped socket.
+    database = sys.modules.get("framework.database")
+    if database is not None and database._engine is not None:
+        database._engine.dispose()
+
+
+class Server(BaseApplication):
+    """Pre-fork gunicorn server for one Flask app.
+
+    The app is imported once in the master (`preload_app`) and the workers
+    are forked from it, so imports, models and warm caches are shared
+    copy-on-write. The heap is frozen before forking so the garbage collector
+    does not touch (and copy) the inherited pages. On SIGTERM workers get
+    `graceful_timeout` seconds to finish in-flight requests.
+    """
+
+    def __init__(self, app, options=None):
+        self.application = app
+        self.options = options or {}
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        return self.application
+
+
+def options():
+    return {
+        "bind": f"{WEB_HOST}:{WEB_PORT}",
+        "workers": WEB_WORKERS,
+        "threads": WEB_THREADS,
+        "worker_class": "gthread",
+        "preload_app": True,
+        "timeout": WEB_TIMEOUT,
+        "graceful_timeout": WEB_GRACEFUL_TIMEOUT,
+        "max_requests": WEB_MAX_REQUESTS,
+        "max_requests_jitter": WEB_MAX_REQUESTS // 10,
+        "accesslog": "-",
+        "worker_exit": _worker_exit,
+    }
+
+
+def run(folder=None):
+    path = app_path(folder)
+    if SERVER_RELOAD:
+        # Development: single process with the code reloader.
+        load_app(path).run(host=WEB_HOST, port=WEB_PORT, debug=True, use_reloader=True)
+        return
+    gc.disable()
+    app = load_app(path)
+    gc.freeze()
+    gc.enable()
+    print(f"Serving {folder or APPLICATION_FOLDER} with {WEB_WORKERS} workers x {WEB_THREADS} threads")
+    Server(app, options()).run()
+
+
+if __name__ == "__main__":
+    run(sys.argv[1] if len(sys.argv) > 1 else None)
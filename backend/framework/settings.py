@@ -0,0 +1,43 @@
+import os
+
+
+class Settings:
+    """Framework configuration, read from the environment once.
+
+    `DATABASE_URL` wins when it is set (the test harness points it at
+    SQLite); otherwise the URL is built from the POSTGRES_* variables.
+    """
+
+    def __init__(self, environ=None):
+        environ = os.environ if environ is None else environ
+        user = environ.get("POSTGRES_USER", "postgres")
+        password = environ.get("POSTGRES_PASSWORD", "postgres")
+        host = environ.get("POSTGRES_HOST", "localhost")
+        port = environ.get("POSTGRES_PORT", "5432")
+        db = environ.get("POSTGRES_DB", "postgres")
+        self.database_url = (
+            environ.get("DATABASE_URL")
+            or f"postgresql+psycopg://{user}:{password}@{host}:{port}/{db}"
+        )
+
+        # Pool settings, tune them per deployment. With N pre-fork workers the
+        # server can open up to N * (db_pool_size + db_max_overflow) connections.
+        self.db_pool_size = int(environ.get("DB_POOL_SIZE", "5"))
+        self.db_max_overflow = int(environ.get("DB_MAX_OVERFLOW", "10"))
+        self.db_pool_timeout = float(environ.get("DB_POOL_TIMEOUT", "30"))
+        self.db_pool_recycle = int(environ.get("DB_POOL_RECYCLE", "1800"))
+        self.db_pool_pre_ping = environ.get("DB_POOL_PRE_PING", "1") == "1"
+        self.db_statement_timeout_ms = int(environ.get("DB_STATEMENT_TIMEOUT_MS", "0"))
+        # psycopg prepares a query server side after it ran this many times on
+        # a connection; "none" turns it off (needed behind PgBouncer in
+        # transaction mode), 0 prepares every query.
+        threshold = environ.get("DB_PREPARE_THRESHOLD", "5")
+        self.db_prepare_threshold = None if threshold.lower() in ("", "none") else int(threshold)
+        self.db_stream_batch_size = int(environ.get("DB_STREAM_BATCH_SIZE", "1000"))
+
+    @property
+    def is_postgres(self):
+        return self.database_url.startswith("postgresql")
+
+
+settings = Settings()
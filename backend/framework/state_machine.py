@@ -0,0 +1,136 @@
+from sqlalchemy import Integer, String, column, update, values
+
+
+class StateMachine:
+    """Status transitions applied as one conditional UPDATE per row.
+
+    `transitions` maps a status to the statuses it may move to, e.g.
+    `{"Created": {"In Transit"}, "In Transit": {"Delivered"}}`. An update only
+    matches while the row is still in the expected status (and version, when
+    the table has a version column), so two concurrent writers can never both
+    win: the loser gets no row back instead of overwriting the winner.
+    """
+
+    def __init__(self, table, transitions, status_column="status", version_column="version",
+                 id_column="id"):
+        self.table = getattr(table, "__table__", table)
+        self.transitions = {source: set(targets) for source, targets in transitions.items()}
+        self.status = self.table.c[status_column]
+        self.version = self.table.c[version_column] if version_column in self.table.c else None
+        self.id = self.table.c[id_column]
+
+    def sources(self, target):
+        return sorted(source for source, targets in self.transitions.items() if target in targets)
+
+    def allowed(self, source, target):
+        return target in self.transitions.get(source, ())
+
+    def _returning(self):
+        columns = [self.id, self.status]
+        if self.version is not None:
+            columns.append(self.version)
+        return columns
+
+    def _result(self, item_id, row, error=None):
+        if row is None:
+            return {"id": item_id, "ok": False, "error": error or "Conflict"}
+        result = {"id": item_id, "ok": True, "status": row.status}
+        if self.version is not None:
+            result["version"] = row.version
+        return result
+
+    def transition(self, conn, item_id, target, expected=None, version=None, values=None, where=()):
+        """Move one row to `target`; returns the updated row or None.
+
+        `target` may equal the current status for updates that keep the status
+        (e.g. a new location while In Transit), as long as `transitions` and
+        `where` allow it. Raises ValueError when `expected` can't move to
+        `target` at all.
+        """
+        if expected is not None and target is not None and not self.allowed(expected, target):
+            raise ValueError(f"Cannot move from {expected} to {target}")
+        statement = update(self.table).where(self.id == item_id, *where)
+        if expected is not None:
+            statement = statement.where(self.status == expected)
+        elif target is not None:
+            statement = statement.where(self.status.in_(self.sources(target)))
+        new_values = dict(values or {})
+        if target is not None:
+            new_values[self.status.name] = target
+        if self.version is not None:
+            if version is not None:
+                statement = statement.where(self.version == version)
+            new_values[self.version.name] = self.version + 1
+        statement = statement.values(**new_values).returning(*self._returning())
+        return conn.execute(statement).first()
+
+    def apply_batch(self, conn, items, where=()):
+        """Apply many transitions, results come back in the order of `items`.
+
+        Each item is `{"id", "to", "expected"}` plus optional `"version"` and
+        `"values"` (the same keys for every item). An id repeated in a batch
+        is rejected after its first item. On Postgres the whole batch is a
+        single `UPDATE ... FROM (VALUES ...) RETURNING` round trip.
+        """
+        results = [None] * len(items)
+        valid = []
+        seen = set()
+        for position, item in enumerate(items):
+            if item.get("id") in seen:
+                results[position] = {"id": item.get("id"), "ok": False, "error": "Duplicate id in batch"}
+            elif not self.allowed(item.get("expected"), item.get("to")):
+                results[position] = {
+                    "id": item.get("id"),
+                    "ok": False,
+                    "error": f"Cannot move from {item.get('expected')} to {item.get('to')}",
+                }
+            else:
+                seen.add(item["id"])
+                valid.append((position, item))
+        if not valid:
+            return results
+
+        if conn.dialect.name == "postgresql":
+            rows = self._batch_update(conn, [item for _, item in valid], where)
+            for position, item in valid:
+                results[position] = self._result(item["id"], rows.get(item["id"]))
+        else:
+            for position, item in valid:
+                row = self.transition(
+                    conn, item["id"], item["to"], item["expected"], item.get("version"),
+                    item.get("values"), where,
+                )
+                results[position] = self._result(item["id"], row)
+        return results
+
+    def _batch_update(self, conn, items, where):
+        value_names = sorted(items[0].get("values") or {})
+        with_version = self.version is not None and "version" in items[0]
+        batch_columns = [
+            column("id", self.id.type),
+            column("expected", String),
+            column("target", String),
+        ]
+        if with_version:
+            batch_columns.append(column("version", Integer))
+        batch_columns.extend(column(name, self.table.c[name].type) for name in value_names)
+        data = []
+        for item in items:
+            row = [item["id"], item["expected"], item["to"]]
+            if with_version:
+                row.append(item["version"])
+            row.extend((item.get("values") or {})[name] for name in value_names)
+            data.append(tuple(row))
+        batch = values(*batch_columns, name="batch").data(data)
+
+        statement = update(self.table).where(
+            self.id == batch.c.id, self.status == batch.c.expected, *where
+        )
+        new_values = {self.status.name: batch.c.target}
+        new_values.update({name: batch.c[name] for name in value_names})
+        if self.version is not None:
+            if with_version:
+                statement = statement.where(self.version == batch.c.version)
+            new_values[self.version.name] = self.version + 1
+        statement = statement.values(**new_values).returning(*self._returning())
+        return {row.id: row for row in conn.execute(statement)}
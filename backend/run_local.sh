@@ -10,4 +10,9 @@ else
   python /app/framework/scripts/populate_database.py
 fi
 
-flask run --host=0.0.0.0 --port=4000 --reload
+if [ "${SERVER_RELOAD:-0}" = "1" ]; then
+  flask run --host=0.0.0.0 --port=4000 --reload
+else
+  # As a module, so /app (not /app/framework) is first on sys.path.
+  exec python -m framework.server
+fi
@@ -0,0 +1,41 @@
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# The framework tests import `framework.*` from backend, as the apps do.
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../backend")))
+# Modules that need their own tables declare them on a local declarative_base(),
+# not on framework.models.Base, so alembic autogenerate never picks them up.
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    hits = []
+    delay = 0.0
+
+    def do_GET(self):
+        self.hits.append(self.path)
+        time.sleep(self.delay)
+        body = json.dumps({"index": self.path.rsplit("/", 1)[-1], "hit": len(self.hits)}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    handler = type("Handler", (StubHandler,), {"hits": [], "delay": 0.0})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/api/2014", handler
+    server.shutdown()
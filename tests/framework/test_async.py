@@ -0,0 +1,48 @@
+
+from flask import Flask, jsonify
+from sqlalchemy import create_engine, func, insert, select
+
+from framework import database
+from framework.http_cache import UpstreamCache, async_client
+from framework.models import MotivationalPhrase
+
+
+def test_async_view_reads_through_async_session(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    engine = create_engine(url)
+    MotivationalPhrase.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(MotivationalPhrase), [{"phrase": "Keep going"}, {"phrase": "Ship it"}])
+    monkeypatch.setattr(database.settings, "database_url", url)
+    monkeypatch.setattr(database, "_async_engine", None)
+
+    app = Flask(__name__)
+
+    @app.route("/count")
+    async def count():
+        async with database.get_async_session() as session:
+            total = await session.scalar(select(func.count()).select_from(MotivationalPhrase))
+        return jsonify({"count": total})
+
+    client = app.test_client()
+    assert client.get("/count").get_json() == {"count": 2}
+    assert client.get("/count").get_json() == {"count": 2}
+    assert str(database.get_async_engine().url).startswith("sqlite+aiosqlite")
+
+
+def test_async_view_fetches_upstream_concurrently(stub):
+    base_url, handler = stub
+    handler.delay = 0.2
+    cache = UpstreamCache(base_url, ttl=60, session_factory=None)
+    app = Flask(__name__)
+
+    @app.route("/monsters")
+    async def monsters():
+        async with async_client() as client:
+            keys = [("monsters", name) for name in ("bat", "owl", "bat", "rat")]
+            return jsonify([monster["index"] for monster in await cache.aget_many(client, keys)])
+
+    response = app.test_client().get("/monsters")
+    assert response.get_json() == ["bat", "owl", "bat", "rat"]
+    assert sorted(handler.hits) == ["/api/2014/monsters/bat", "/api/2014/monsters/owl", "/api/2014/monsters/rat"]
+    assert cache.get("monsters", "owl")["index"] == "owl"
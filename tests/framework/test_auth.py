@@ -0,0 +1,86 @@
+import os
+import subprocess
+import sys
+
+import jwt
+import pytest
+from flask import Flask, g, jsonify
+
+os.environ.setdefault("JWT_SECRET", "test-secret")
+from framework import auth
+
+USERS = {"1": {"role": "Carrier", "carrier_id": 7}, "2": {"role": "Global Manager"}}
+loads = []
+
+
+@auth.user_loader
+def load_user(user_id):
+    loads.append(user_id)
+    return USERS.get(user_id)
+
+
+app = auth.init_app(Flask(__name__))
+
+
+@app.route("/shipments")
+@auth.login_required(roles=["Global Manager", "Carrier"])
+def list_shipments():
+    return jsonify({"success": True, "data": g.user})
+
+
+@app.route("/admin")
+@auth.login_required(roles=["Global Manager"])
+def admin():
+    return jsonify({"success": True})
+
+
+def get(path, token=None):
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    return app.test_client().get(path, headers=headers)
+
+
+def test_token_and_user_are_cached(monkeypatch):
+    decodes = []
+    original = jwt.decode
+    monkeypatch.setattr(jwt, "decode", lambda *args, **kwargs: decodes.append(1) or original(*args, **kwargs))
+    auth.invalidate_user()
+    loads.clear()
+    token = auth.issue_token(1)
+    for _ in range(3):
+        response = get("/shipments", token)
+        assert response.status_code == 200
+        assert response.json["data"] == USERS["1"]
+        assert response.headers["Server-Timing"].startswith("auth;dur=")
+    assert decodes == [1]
+    assert loads == ["1"]
+
+    auth.invalidate_user("1")
+    get("/shipments", token)
+    assert loads == ["1", "1"]
+
+
+def test_missing_invalid_and_expired_tokens():
+    assert get("/shipments").status_code == 401
+    assert get("/shipments", "garbage").status_code == 401
+    assert get("/shipments", auth.issue_token(1, expires_in=-10)).status_code == 401
+
+
+def test_cached_token_expires(monkeypatch):
+    token = auth.issue_token(2, expires_in=60)
+    assert auth.verify_token(token)["sub"] == "2"
+    monkeypatch.setattr(auth.time, "time", lambda: 10 ** 12)
+    with pytest.raises(jwt.ExpiredSignatureError):
+        auth.verify_token(token)
+
+
+def test_role_is_enforced():
+    assert get("/admin", auth.issue_token(1)).status_code == 403
+    assert get("/admin", auth.issue_token(2)).status_code == 200
+
+
+def test_import_fails_without_a_secret():
+    env = {key: value for key, value in os.environ.items() if key != "JWT_SECRET"}
+    env["PYTHONPATH"] = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../backend"))
+    result = subprocess.run([sys.executable, "-c", "import framework.auth"], env=env, capture_output=True, text=True)
+    assert result.returncode != 0
+    assert "JWT_SECRET is not set" in result.stderr
@@ -0,0 +1,98 @@
+import csv
+import json
+import os
+
+import pytest
+
+from framework.columnar import ColumnTable
+
+FILES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../exercises/session_2/files"))
+
+
+def read(file_name):
+    with open(os.path.join(FILES_DIR, file_name), newline="") as file:
+        return list(csv.DictReader(file))
+
+
+def people_names():
+    return {row["id"]: row["full_name"] for row in read("people_data.csv")}
+
+
+@pytest.fixture(scope="module")
+def physical():
+    names = people_names()
+    rows = read("physical_data.csv")
+    return ColumnTable(
+        {
+            "person_id": [int(row["person_id"]) for row in rows],
+            "full_name": [names[row["person_id"]] for row in rows],
+            "hair_color": [row["hair_color"] for row in rows],
+            "nationality": [row["nationality"] for row in rows],
+            "age": [int(row["age"]) for row in rows],
+            "height_cm": [int(row["height_cm"]) for row in rows],
+            "weight_kg": [int(row["weight_kg"]) for row in rows],
+        },
+        categorical=("full_name", "hair_color", "nationality"),
+    )
+
+
+def test_group_means_by_one_column(physical):
+    weights = physical.group_means(["weight_kg"], by="hair_color")["weight_kg"]
+    above_70 = {hair: round(weight, 2) for hair, weight in weights.items() if weight > 70}
+    assert above_70 == {"auburn": 73.52, "black": 78.12, "brown": 77.84, "gray": 76.67, "red": 70.35}
+
+
+def test_group_means_by_two_columns(physical):
+    weights = physical.group_means(["weight_kg"], by=["nationality", "hair_color"])["weight_kg"]
+    assert round(weights[("Brazilian", "black")], 2) == 75.20
+    assert round(weights[("German", "brown")], 2) == 70.17
+    assert ("Spanish", "blonde") not in weights
+
+
+def test_means_with_filter(physical):
+    heights = physical.group_means(["height_cm"], by="nationality")["height_cm"]
+    assert round(heights["Nigerian"], 2) == 168.54
+    assert round(physical.mean("height_cm"), 2) == 176.34
+    assert round(physical.mean("height_cm", where=physical.equals("nationality", "Spanish")), 2) == 183.0
+
+
+def test_top_n_per_group(physical):
+    oldest = physical.top_n("age", by="nationality", n=2, label="person_id", labels=people_names())
+    assert set(oldest["Mexican"]) == {"Paul Kelly", "Kimberly Mayer"}
+    assert oldest == physical.top_n("age", by="nationality", n=2, label="full_name")
+    assert all(len(names) == 2 for names in oldest.values())
+
+
+def test_value_counts_breaks_ties_by_name():
+    hobbies = ColumnTable(
+        {"person_id": [row["person_id"] for row in read("hobbies_data.csv")]},
+        categorical=("person_id",),
+    )
+    top = [name for name, _ in hobbies.value_counts("person_id", labels=people_names())[:3]]
+    assert top == ["Alexander Jensen", "Amy Graham", "Amy James"]
+
+
+def test_people_sharing_a_name_are_counted_apart():
+    people = ColumnTable(
+        {"person_id": [1, 1, 2, 3, 3, 3], "age": [40, 40, 70, 30, 30, 30],
+         "nationality": ["Mexican"] * 6},
+        categorical=("person_id", "nationality"),
+    )
+    names = {1: "Ana Mora", 2: "Ana Mora", 3: "Luis Vega"}
+    assert people.value_counts("person_id", labels=names) == [("Luis Vega", 3), ("Ana Mora", 2), ("Ana Mora", 1)]
+    oldest = people.top_n("age", by="nationality", n=3, label="person_id", labels=names)
+    assert oldest == {"Mexican": ["Ana Mora", "Ana Mora", "Ana Mora"]}
+
+
+def test_null_categories_form_no_group():
+    people = ColumnTable(
+        {"person_id": [1, 2, 3, 4], "age": [40, 70, 30, 50],
+         "nationality": ["Mexican", None, "Mexican", None]},
+        categorical=("nationality",),
+    )
+    assert people.group_means(["age"], by="nationality") == {"age": {"Mexican": 35.0}}
+    assert people.value_counts("nationality") == [("Mexican", 2)]
+    assert list(people["nationality"]) == ["Mexican", None, "Mexican", None]
+    oldest = people.top_n("age", by="nationality", n=5, label="person_id")
+    assert oldest == {"Mexican": [1, 3]}
+    assert json.dumps(oldest) == '{"Mexican": [1, 3]}'
@@ -0,0 +1,107 @@
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from framework import http_cache
+from framework.http_cache import UpstreamCache, save_snapshot
+from framework.models import UpstreamResponse
+
+
+def test_fresh_entries_skip_upstream(stub):
+    base_url, handler = stub
+    cache = UpstreamCache(base_url, ttl=60, session_factory=None)
+    assert cache.get("monsters", "bat")["index"] == "bat"
+    assert cache.get("monsters", "bat")["index"] == "bat"
+    assert handler.hits == ["/api/2014/monsters/bat"]
+
+
+def test_concurrent_misses_share_one_fetch(stub):
+    base_url, handler = stub
+    handler.delay = 0.2
+    cache = UpstreamCache(base_url, ttl=60, session_factory=None)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("monsters", "bat"))) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 10
+    assert handler.hits == ["/api/2014/monsters/bat"]
+
+
+def test_stale_entries_are_served_while_revalidating(stub):
+    base_url, handler = stub
+    cache = UpstreamCache(base_url, ttl=0, stale_ttl=60, session_factory=None)
+    assert cache.get("monsters")["hit"] == 1
+    assert cache.get("monsters")["hit"] == 1
+    for _ in range(50):
+        if len(handler.hits) == 2 and cache.memory.get(("monsters", ""))[0]["hit"] == 2:
+            break
+        time.sleep(0.01)
+    assert cache.get("monsters")["hit"] == 2
+
+
+def test_concurrent_stale_reads_refresh_once(stub, monkeypatch):
+    base_url, handler = stub
+    cache = UpstreamCache(base_url, ttl=5, stale_ttl=60, session_factory=None)
+    cache.prime("monsters", "bat", {"index": "bat", "hit": 0}, stored_at=time.time() - 10)
+    results = []
+    readers = [threading.Thread(target=lambda: results.append(cache.get("monsters", "bat"))) for _ in range(20)]
+
+    # Refresh threads are held back until every stale read went through.
+    refreshes = []
+
+    class Deferred:
+        def __init__(self, target, daemon=None):
+            self.target = target
+
+        def start(self):
+            refreshes.append(self.target)
+
+    monkeypatch.setattr(threading, "Thread", Deferred)
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join()
+    monkeypatch.undo()
+    assert [value["hit"] for value in results] == [0] * 20
+
+    for refresh in refreshes:
+        refresh()
+    assert cache.get("monsters", "bat")["hit"] == 1
+    assert handler.hits == ["/api/2014/monsters/bat"]
+
+
+def test_database_tier_survives_restarts(stub, tmp_path):
+    base_url, handler = stub
+    engine = create_engine(f"sqlite:///{tmp_path / 'http_cache.db'}")
+    UpstreamResponse.__table__.create(engine)
+    session_factory = sessionmaker(bind=engine)
+    UpstreamCache(base_url, ttl=60, session_factory=session_factory).get("monsters", "bat")
+    restarted = UpstreamCache(base_url, ttl=60, session_factory=session_factory)
+    assert restarted.get("monsters", "bat")["index"] == "bat"
+    assert handler.hits == ["/api/2014/monsters/bat"]
+
+
+def test_snapshot_serves_without_network(stub, tmp_path):
+    base_url, handler = stub
+    path = str(tmp_path / "monsters.json.gz")
+    save_snapshot(path, base_url, [("monsters", "", {"count": 1}), ("monsters", "bat", {"index": "bat"})])
+    cache = UpstreamCache(base_url, ttl=60, session_factory=None, snapshot=path)
+    assert cache.get("monsters") == {"count": 1}
+    assert cache.get("monsters", "bat") == {"index": "bat"}
+    assert handler.hits == []
+
+
+def test_snapshot_entries_never_expire(stub, tmp_path, monkeypatch):
+    base_url, handler = stub
+    path = str(tmp_path / "monsters.json.gz")
+    save_snapshot(path, base_url, [("monsters", "bat", {"index": "bat"})])
+    cache = UpstreamCache(base_url, ttl=60, stale_ttl=120, session_factory=None, snapshot=path)
+    later = time.time() + 3600
+    monkeypatch.setattr(http_cache.time, "time", lambda: later)
+    assert cache.get("monsters", "bat") == {"index": "bat"}
+    time.sleep(0.05)
+    assert handler.hits == []
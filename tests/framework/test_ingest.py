@@ -0,0 +1,138 @@
+import json
+
+import pytest
+from sqlalchemy import Column, DateTime, Float, Integer, MetaData, Table, create_engine, select
+from sqlalchemy.exc import OperationalError
+
+from framework.ingest import AssignmentCache, LocationIngestor
+
+metadata = MetaData()
+shipments = Table(
+    "shipments",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("carrier_id", Integer),
+    Column("latitude", Float),
+    Column("longitude", Float),
+    Column("location_updated_at", DateTime),
+)
+history = Table(
+    "shipment_locations",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("shipment_id", Integer),
+    Column("latitude", Float),
+    Column("longitude", Float),
+    Column("recorded_at", DateTime),
+)
+
+
+@pytest.fixture
+def ingestor(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'ingest.db'}")
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(shipments.insert(), [{"id": 1, "carrier_id": 7}, {"id": 2, "carrier_id": 8}])
+    loads = []
+
+    def load_assignments():
+        loads.append(1)
+        with engine.connect() as conn:
+            return conn.execute(select(shipments.c.id, shipments.c.carrier_id)).all()
+
+    ingestor = LocationIngestor(
+        engine, history, shipments, AssignmentCache(load_assignments),
+        latest_columns={"latitude": "latitude", "longitude": "longitude", "recorded_at": "location_updated_at"},
+        batch_size=3,
+    )
+    ingestor.loads = loads
+    return ingestor
+
+
+def ping(shipment_id, minute, latitude=9.9):
+    return json.dumps({
+        "shipment_id": shipment_id,
+        "latitude": latitude,
+        "longitude": -84.1,
+        "recorded_at": f"2025-01-01T10:{minute:02d}:00",
+    })
+
+
+def test_pings_are_validated_and_buffered(ingestor):
+    accepted, errors = ingestor.submit(7, [ping(1, 0), ping(2, 0), "{oops", "", ping(1, 1, latitude=123)])
+    assert accepted == 1
+    assert [error["line"] for error in errors] == [2, 3, 5]
+    with ingestor.engine.connect() as conn:
+        assert conn.execute(select(history)).all() == []
+    assert ingestor.flush() == 1
+    assert ingestor.loads == [1]
+
+
+def test_full_buffer_flushes_history_and_latest_position(ingestor):
+    ingestor.submit(7, [ping(1, 5, latitude=1.0), ping(1, 7, latitude=3.0), ping(1, 6, latitude=2.0)])
+    with ingestor.engine.connect() as conn:
+        assert len(conn.execute(select(history)).all()) == 3
+        latest = conn.execute(select(shipments).where(shipments.c.id == 1)).one()
+    assert latest.latitude == 3.0
+    assert latest.location_updated_at.minute == 7
+
+    # An older ping arriving late is kept in history but does not move the shipment back.
+    ingestor.submit(7, [ping(1, 1, latitude=0.5)])
+    ingestor.stop()
+    with ingestor.engine.connect() as conn:
+        assert len(conn.execute(select(history)).all()) == 4
+        assert conn.execute(select(shipments.c.latitude).where(shipments.c.id == 1)).scalar() == 3.0
+
+
+def test_offsets_are_normalized_and_bad_bytes_are_reported(ingestor):
+    aware = json.dumps({"shipment_id": 1, "latitude": 4.0, "longitude": -84.1,
+                        "recorded_at": "2025-01-01T12:30:00+02:00"})
+    accepted, errors = ingestor.submit(7, [ping(1, 5, latitude=1.0), aware.encode(), b"\xff\xfe"])
+    assert accepted == 2
+    assert [error["line"] for error in errors] == [3]
+    assert ingestor.flush() == 2
+    with ingestor.engine.connect() as conn:
+        latest = conn.execute(select(shipments).where(shipments.c.id == 1)).one()
+    # 12:30+02:00 is 10:30 UTC, newer than 10:05.
+    assert (latest.latitude, latest.location_updated_at.hour) == (4.0, 10)
+
+
+def test_failing_batch_is_moved_aside_and_buffer_is_capped(ingestor, monkeypatch):
+    ingestor.max_buffer = 2
+    ingestor.batch_size = 100
+    ingestor.submit(7, [ping(1, 1), ping(1, 2), ping(1, 3)])
+    assert len(ingestor._buffer) == 2 and len(ingestor.rejected) == 1
+
+    def broken(conn, pings):
+        raise RuntimeError("poison batch")
+
+    monkeypatch.setattr(ingestor, "_write_history", broken)
+    for _ in range(ingestor.max_retries):
+        with pytest.raises(RuntimeError):
+            ingestor.flush()
+    assert ingestor._buffer == [] and ingestor._pending == []
+    assert len(ingestor.rejected) == 3
+
+    monkeypatch.undo()
+    ingestor.submit(7, [ping(1, 4)])
+    assert ingestor.flush() == 1
+
+
+def test_outage_keeps_every_ping_and_submit_does_not_raise(ingestor, monkeypatch):
+    def unreachable(conn, pings):
+        raise OperationalError("COPY shipment_locations", {}, ConnectionError("server closed the connection"))
+
+    monkeypatch.setattr(ingestor, "_write_history", unreachable)
+    for minute in range(0, 12, 3):
+        # Every third ping fills a batch and flushes into the outage.
+        accepted, errors = ingestor.submit(7, [ping(1, minute + offset) for offset in range(3)])
+        assert (accepted, errors) == (3, [])
+    with pytest.raises(OperationalError):
+        ingestor.flush()
+    assert len(ingestor.rejected) == 0
+
+    monkeypatch.undo()
+    assert ingestor.flush() == 12
+    with ingestor.engine.connect() as conn:
+        assert len(conn.execute(select(history)).all()) == 12
+    assert ingestor._pending == [] and ingestor._buffer == []
@@ -0,0 +1,68 @@
+import os
+
+from sqlalchemy import Column, ForeignKey, Integer, MetaData, String, Table, create_engine, func, select
+
+from framework.loaders import load_csv_files
+from framework.models import SeedLog
+
+FILES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../exercises/session_2/files"))
+
+metadata = MetaData()
+people = Table(
+    "people",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("full_name", String),
+)
+hobbies = Table(
+    "hobbies",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("person_id", Integer, ForeignKey("people.id")),
+    Column("hobby", String),
+)
+
+
+def make_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'loaders.db'}")
+    metadata.create_all(engine)
+    SeedLog.__table__.create(engine)
+    return engine
+
+
+def count(engine, table):
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(table)).scalar()
+
+
+def test_loads_parents_before_children_in_chunks(tmp_path):
+    engine = make_engine(tmp_path)
+    loaded = load_csv_files(
+        [
+            (hobbies, os.path.join(FILES_DIR, "hobbies_data.csv")),
+            (people, os.path.join(FILES_DIR, "people_data.csv")),
+        ],
+        engine=engine,
+        chunk_size=7,
+    )
+    assert loaded == {"people": 100, "hobbies": 300}
+    assert count(engine, people) == 100
+    assert count(engine, hobbies) == 300
+
+
+def test_rerun_with_same_files_is_a_noop(tmp_path):
+    engine = make_engine(tmp_path)
+    files = [(people, os.path.join(FILES_DIR, "people_data.csv"))]
+    load_csv_files(files, engine=engine)
+    assert load_csv_files(files, engine=engine) == {}
+    assert count(engine, people) == 100
+
+
+def test_changed_file_is_reloaded(tmp_path):
+    engine = make_engine(tmp_path)
+    path = tmp_path / "people_data.csv"
+    path.write_text("id,full_name\n1,Ada Lovelace\n2,\n")
+    load_csv_files([(people, str(path))], engine=engine)
+    path.write_text("id,full_name\n1,Ada Lovelace\n")
+    assert load_csv_files([(people, str(path))], engine=engine) == {"people": 1}
+    assert count(engine, people) == 1
@@ -0,0 +1,101 @@
+import time
+
+from flask import Flask, Response, jsonify
+from sqlalchemy import create_engine, text
+
+from framework.metrics import Metrics, track_upstream
+
+
+def make_app():
+    app = Flask(__name__)
+    metrics = Metrics(app, n_plus_one_threshold=3)
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE people (id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(text("INSERT INTO people (name) VALUES ('Ada'), ('Grace'), ('Linus')"))
+
+    @app.route("/people/<int:person_id>")
+    def get_person(person_id):
+        with engine.connect() as conn:
+            name = conn.execute(text("SELECT name FROM people WHERE id = :id"), {"id": person_id}).scalar()
+        with track_upstream():
+            time.sleep(0.01)
+        return jsonify({"success": True, "data": name})
+
+    @app.route("/people/find")
+    def find_people():
+        with engine.connect() as conn:
+            ids = conn.execute(text("SELECT id FROM people")).scalars().all()
+            names = [
+                conn.execute(text("SELECT name FROM people WHERE id = :id"), {"id": person_id}).scalar()
+                for person_id in ids
+            ]
+        return jsonify({"success": True, "data": names})
+
+    @app.route("/people/export")
+    def export_people():
+        closed = app.config.setdefault("export_closed", [])
+
+        def rows():
+            try:
+                for name in ("Ada", "Grace", "Linus"):
+                    yield f"{name}\n"
+            finally:
+                closed.append(True)
+
+        return Response(rows(), mimetype="text/csv")
+
+    return app, metrics
+
+
+def sample(body, name, route):
+    prefix = f'{name}{{route="{route}",method="GET"}} '
+    for line in body.splitlines():
+        if line.startswith(prefix):
+            return float(line[len(prefix):])
+    raise AssertionError(f"{prefix} not in metrics")
+
+
+def test_records_latency_queries_upstream_and_size_per_route():
+    app, metrics = make_app()
+    client = app.test_client()
+    sizes = [len(client.get(f"/people/{person_id}").data) for person_id in (1, 2)]
+
+    body = client.get("/metrics").get_data(as_text=True)
+    assert 'http_request_duration_seconds_count{route="/people/<int:person_id>",method="GET"} 2' in body
+    assert 'http_request_duration_seconds_bucket{route="/people/<int:person_id>",method="GET",le="+Inf"} 2' in body
+    assert 'http_requests_total{route="/people/<int:person_id>",method="GET",status="200"} 2' in body
+    assert sample(body, "http_request_db_queries_total", "/people/<int:person_id>") == 2
+    assert sample(body, "http_request_db_seconds_total", "/people/<int:person_id>") > 0
+    assert sample(body, "http_request_upstream_calls_total", "/people/<int:person_id>") == 2
+    assert sample(body, "http_request_upstream_seconds_total", "/people/<int:person_id>") >= 0.02
+    assert sample(body, "http_response_bytes_total", "/people/<int:person_id>") == sum(sizes)
+    # The metrics endpoint does not measure itself.
+    assert 'route="/metrics"' not in body
+
+
+def test_flags_repeated_statements_as_n_plus_one(caplog):
+    app, metrics = make_app()
+    client = app.test_client()
+    client.get("/people/find")
+    client.get("/people/1")
+
+    warnings = [record.getMessage() for record in caplog.records if record.levelname == "WARNING"]
+    assert warnings == [
+        "Possible N+1 in GET /people/find: statement ran 3 times: SELECT name FROM people WHERE id = ?"
+    ]
+    body = metrics.render()
+    assert sample(body, "http_request_n_plus_one_total", "/people/find") == 1
+    assert sample(body, "http_request_db_queries_total", "/people/find") == 4
+    assert sample(body, "http_request_n_plus_one_total", "/people/<int:person_id>") == 0
+
+
+def test_counts_bytes_of_streamed_responses():
+    app, metrics = make_app()
+    client = app.test_client()
+    response = client.get("/people/export")
+    assert response.data == b"Ada\nGrace\nLinus\n"
+    response.close()
+
+    assert sample(metrics.render(), "http_response_bytes_total", "/people/export") == len(response.data)
+    assert app.config["export_closed"] == [True]
@@ -0,0 +1,109 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask, request
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, create_engine, select
+
+from framework.pagination import decode_cursor, fetch_page, keyset_select, keyset_union
+from framework.responses import page_response
+
+metadata = MetaData()
+shipments = Table(
+    "shipments",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("origin_id", Integer),
+    Column("destination_id", Integer),
+    Column("status", String),
+    Column("created_at", DateTime),
+)
+
+
+@pytest.fixture(scope="module")
+def conn():
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    start = datetime(2025, 1, 1)
+    with engine.begin() as connection:
+        connection.execute(shipments.insert(), [
+            {
+                "id": i,
+                "origin_id": i % 5,
+                "destination_id": (i * 3) % 7,
+                "status": "Created" if i % 2 else "In Transit",
+                # Repeated timestamps make the id tie-breaker matter.
+                "created_at": start + timedelta(hours=i // 3),
+            }
+            for i in range(1, 301)
+        ])
+    with engine.connect() as connection:
+        yield connection
+
+
+def key(row):
+    return [row.created_at, row.id]
+
+
+def walk(conn, build):
+    seen, cursor = [], None
+    while True:
+        statement, limit = build(cursor)
+        rows, cursor = fetch_page(conn, statement, limit, key)
+        seen.extend(row.id for row in rows)
+        if cursor is None:
+            return seen
+
+
+def test_keyset_pages_cover_every_row_once(conn):
+    order_by = [shipments.c.created_at, shipments.c.id]
+    base = select(shipments).where(shipments.c.status == "Created")
+    ids = walk(conn, lambda cursor: keyset_select(base, order_by, cursor, limit=7))
+    assert ids == [i for i in range(1, 301) if i % 2]
+
+
+def test_union_scope_matches_or_filter(conn):
+    ids = walk(conn, lambda cursor: keyset_union(
+        shipments, ["origin_id", "destination_id"], 3, ["created_at", "id"], cursor, limit=9
+    ))
+    assert ids == [i for i in range(1, 301) if i % 5 == 3 or (i * 3) % 7 == 3]
+
+
+def test_descending_pages(conn):
+    order_by = [shipments.c.created_at, shipments.c.id]
+    ids = walk(conn, lambda cursor: keyset_select(select(shipments), order_by, cursor, limit=50, descending=True))
+    assert ids == list(range(300, 0, -1))
+
+
+def test_bad_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        decode_cursor("not a cursor")
+
+
+def test_bad_limit_or_cursor_answers_400():
+    app = Flask(__name__)
+
+    @app.route("/shipments")
+    def list_shipments():
+        statement, limit = keyset_select(
+            select(shipments), [shipments.c.id], request.args.get("cursor"), request.args.get("limit")
+        )
+        return {"success": True, "data": limit}
+
+    client = app.test_client()
+    assert client.get("/shipments?limit=5").get_json() == {"success": True, "data": 5}
+    for query in ("limit=abc", "cursor=oops"):
+        response = client.get(f"/shipments?{query}")
+        assert response.status_code == 400
+        assert response.get_json()["success"] is False
+
+
+def test_page_response_streams_envelope(conn):
+    statement, limit = keyset_select(select(shipments), [shipments.c.id], limit=3)
+    rows, cursor = fetch_page(conn, statement, limit, lambda row: [row.id])
+    with Flask(__name__).test_request_context():
+        response = page_response(rows, cursor, serialize=lambda row: dict(row._mapping))
+        body = json.loads(response.get_data())
+    assert body["success"] is True
+    assert body["data"]["next_cursor"] == cursor
+    assert [item["id"] for item in body["data"]["results"]] == [1, 2, 3]
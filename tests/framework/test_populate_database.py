@@ -0,0 +1,62 @@
+import os
+import shutil
+import sys
+
+from sqlalchemy import create_engine, inspect
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../backend"))
+from framework.scripts.populate_database import run_alembic_upgrade, run_seeds
+
+BOILERPLATE = os.path.join(BACKEND_DIR, "contributors", "capdevcr", "boilerplate")
+
+MIGRATION = '''
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table("widgets", sa.Column("id", sa.Integer, primary_key=True))
+
+
+def downgrade():
+    op.drop_table("widgets")
+'''
+
+
+def make_app(tmp_path):
+    """A copy of the boilerplate with one migration and a seed."""
+    app_dir = tmp_path / "demo"
+    shutil.copytree(BOILERPLATE, app_dir, ignore=shutil.ignore_patterns("__pycache__"))
+    (app_dir / "alembic" / "versions" / "0001_widgets.py").write_text(MIGRATION)
+    (app_dir / "seeds.py").write_text(
+        "import os\n"
+        "import app.models\n"
+        "with open(os.environ['SEED_MARKER'], 'a') as marker:\n"
+        "    marker.write('seeded\\n')\n"
+    )
+    return str(app_dir)
+
+
+def test_upgrade_runs_in_process_and_skips_at_head(tmp_path):
+    app_dir = make_app(tmp_path)
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    with engine.connect() as connection:
+        assert run_alembic_upgrade(app_dir, connection) is True
+        assert run_alembic_upgrade(app_dir, connection) is False
+    tables = inspect(engine).get_table_names()
+    assert "widgets" in tables and "alembic_version_app" in tables
+    assert os.getcwd() != app_dir and app_dir not in sys.path
+
+
+def test_seeds_run_in_process_with_the_app_importable(tmp_path, monkeypatch):
+    app_dir = make_app(tmp_path)
+    marker = tmp_path / "marker"
+    monkeypatch.setenv("SEED_MARKER", str(marker))
+    assert run_seeds(app_dir) is True
+    assert marker.read_text() == "seeded\n"
+    assert run_seeds(str(tmp_path)) is False
@@ -0,0 +1,88 @@
+
+from sqlalchemy import Column, ForeignKey, Integer, String, create_engine, select
+from sqlalchemy.orm import Session, declarative_base
+
+from framework.models import ReferenceVersion
+from framework.reference_data import bulk_create, clear_references, get_reference, reference
+
+Base = declarative_base()
+
+
+class Warehouse(Base):
+    __tablename__ = "reference_test_warehouses"
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+
+
+class Shipment(Base):
+    __tablename__ = "reference_test_shipments"
+    id = Column(Integer, primary_key=True)
+    origin_id = Column(Integer, ForeignKey("reference_test_warehouses.id"))
+    destination_id = Column(Integer, ForeignKey("reference_test_warehouses.id"))
+
+
+loads = []
+
+
+@reference("reference_test_warehouses", tables=["reference_test_warehouses"])
+def warehouses(session):
+    loads.append(1)
+    return {warehouse.id: warehouse.name for warehouse in session.scalars(select(Warehouse))}
+
+
+def make_session():
+    engine = create_engine("sqlite://")
+    for model in (ReferenceVersion, Warehouse, Shipment):
+        model.__table__.create(engine)
+    clear_references()
+    loads.clear()
+    return Session(engine)
+
+
+def test_reference_set_is_reloaded_only_after_a_write():
+    with make_session() as session:
+        session.add_all([Warehouse(id=1, name="San José"), Warehouse(id=2, name="Limón")])
+        session.commit()
+
+        assert get_reference(session, "reference_test_warehouses") == {1: "San José", 2: "Limón"}
+        assert get_reference(session, "reference_test_warehouses") == {1: "San José", 2: "Limón"}
+        assert loads == [1]
+
+        session.add(Warehouse(id=3, name="Heredia"))
+        session.commit()
+        assert session.get(ReferenceVersion, "reference_test_warehouses").version == 2
+        assert 3 in get_reference(session, "reference_test_warehouses")
+        assert loads == [1, 1]
+
+
+def test_bulk_create_keeps_item_order_and_reports_errors():
+    with make_session() as session:
+        session.add_all([Warehouse(id=1, name="San José"), Warehouse(id=2, name="Limón")])
+        session.commit()
+
+        def validate(item):
+            known = get_reference(session, "reference_test_warehouses")
+            errors = []
+            if item["origin_id"] == item["destination_id"]:
+                errors.append("Origin and destination must differ")
+            if item["destination_id"] not in known:
+                errors.append("Unknown destination warehouse")
+            return errors
+
+        items = [
+            {"origin_id": 1, "destination_id": 2},
+            {"origin_id": 1, "destination_id": 1},
+            {"origin_id": 1, "destination_id": 9},
+            {"origin_id": 2, "destination_id": 1},
+            {"origin_id": 2},
+        ]
+        results = bulk_create(session.connection(), Shipment, items, validate)
+        session.commit()
+
+        assert [result["ok"] for result in results] == [True, False, False, True, False]
+        assert results[1]["errors"] == ["Origin and destination must differ"]
+        assert results[2]["errors"] == ["Unknown destination warehouse"]
+        assert "destination_id" in results[4]["errors"][0]
+        rows = session.execute(select(Shipment.id, Shipment.origin_id).order_by(Shipment.id)).all()
+        assert [(results[0]["id"], 1), (results[3]["id"], 2)] == [tuple(row) for row in rows]
+        assert loads == [1]
@@ -0,0 +1,63 @@
+
+from sqlalchemy import Column, Integer, String, create_engine, func, select
+from sqlalchemy.orm import Session, declarative_base
+
+from framework.models import ReportSnapshot
+from framework.reports import get_report, refresh_reports, report
+
+Base = declarative_base()
+
+
+class Favorite(Base):
+    __tablename__ = "report_test_favorites"
+    id = Column(Integer, primary_key=True)
+    food = Column(String)
+
+
+calls = []
+
+
+@report("report_test_most_common_food", tables=["report_test_favorites"])
+def most_common_food(session):
+    calls.append(1)
+    return session.execute(
+        select(Favorite.food).group_by(Favorite.food).order_by(func.count().desc()).limit(1)
+    ).scalar()
+
+
+def test_report_is_served_from_snapshot_until_data_changes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'reports.db'}")
+    Favorite.__table__.create(engine)
+    ReportSnapshot.__table__.create(engine)
+    with Session(engine) as session:
+        session.add_all([Favorite(food="curry"), Favorite(food="curry"), Favorite(food="sushi")])
+        session.commit()
+        refresh_reports(session, ["report_test_most_common_food"])
+        calls.clear()
+
+        assert get_report(session, "report_test_most_common_food") == "curry"
+        assert get_report(session, "report_test_most_common_food") == "curry"
+        assert calls == []
+
+        session.add_all([Favorite(food="sushi"), Favorite(food="sushi")])
+        session.commit()
+        assert session.get(ReportSnapshot, "report_test_most_common_food").stale
+        assert get_report(session, "report_test_most_common_food") == "sushi"
+        assert get_report(session, "report_test_most_common_food") == "sushi"
+        assert calls == [1]
+
+
+def test_refresh_does_not_commit_the_callers_pending_work(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'reports.db'}")
+    Favorite.__table__.create(engine)
+    ReportSnapshot.__table__.create(engine)
+    with Session(engine) as session:
+        session.add(Favorite(food="curry"))
+        session.commit()
+        session.add(Favorite(food="pending"))
+        assert get_report(session, "report_test_most_common_food") == "curry"
+        session.rollback()
+        assert session.scalar(select(func.count()).select_from(Favorite)) == 1
+        # A second refresh of an existing snapshot is an upsert, not a duplicate key.
+        refresh_reports(session, ["report_test_most_common_food"])
+        refresh_reports(session, ["report_test_most_common_food"])
@@ -0,0 +1,127 @@
+import gc
+import gzip
+
+from flask import Flask, jsonify, request
+from sqlalchemy import Column, Integer, String, create_engine, select
+from sqlalchemy.orm import Session, declarative_base
+
+from framework import response_cache
+from framework.response_cache import MemoryBackend, ResponseCache, SQLiteBackend
+
+Base = declarative_base()
+
+
+class Person(Base):
+    __tablename__ = "response_cache_test_people"
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+
+
+def make_app(engine, backend):
+    app = Flask(__name__)
+    cache = ResponseCache(app, backend)
+    app.calls = []
+
+    @app.route("/people")
+    @cache.cached(ttl=60, tables=["response_cache_test_people"])
+    def list_people():
+        app.calls.append(1)
+        with Session(engine) as session:
+            names = session.scalars(select(Person.name).order_by(Person.id)).all()
+        return jsonify({"success": True, "data": names * 200})
+
+    @app.route("/me")
+    @cache.cached(ttl=60)
+    def me():
+        app.calls.append(1)
+        response = jsonify({"success": True, "data": request.headers.get("Authorization")})
+        response.headers["X-Total-Count"] = "1"
+        return response
+
+    return app
+
+
+def make_engine():
+    engine = create_engine("sqlite://")
+    Person.__table__.create(engine)
+    with Session(engine) as session:
+        session.add(Person(name="Ada"))
+        session.commit()
+    return engine
+
+
+def test_hits_skip_the_view_and_revalidate_with_etag():
+    engine = make_engine()
+    app = make_app(engine, MemoryBackend())
+    client = app.test_client()
+
+    first = client.get("/people", headers={"Accept-Encoding": "gzip"})
+    assert first.headers["X-Cache"] == "MISS"
+    assert first.headers["Content-Encoding"] == "gzip"
+    assert b"Ada" in gzip.decompress(first.data)
+
+    second = client.get("/people")
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.get_json()["data"][0] == "Ada"
+    # Identity and gzip bodies differ, so do their strong ETags.
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert first.headers["ETag"].endswith('-gzip"')
+
+    not_modified = client.get(
+        "/people", headers={"If-None-Match": first.headers["ETag"], "Accept-Encoding": "gzip"}
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.data == b""
+    assert not_modified.headers["ETag"] == first.headers["ETag"]
+    other_coding = client.get("/people", headers={"If-None-Match": first.headers["ETag"]})
+    assert other_coding.status_code == 200
+    assert other_coding.headers["ETag"] == second.headers["ETag"]
+    assert app.calls == [1]
+
+
+def test_committed_writes_invalidate_every_worker(tmp_path):
+    engine = make_engine()
+    path = str(tmp_path / "responses.sqlite3")
+    worker_one = make_app(engine, SQLiteBackend(path)).test_client()
+    worker_two = make_app(engine, SQLiteBackend(path)).test_client()
+
+    etag = worker_one.get("/people").headers["ETag"]
+    assert worker_two.get("/people").headers["X-Cache"] == "HIT"
+
+    with Session(engine) as session:
+        session.add(Person(name="Grace"))
+        session.flush()
+        assert worker_two.get("/people").headers["X-Cache"] == "HIT"
+        session.commit()
+
+    response = worker_two.get("/people", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.get_json()["data"][:2] == ["Ada", "Grace"]
+    assert worker_one.get("/people").headers["X-Cache"] == "HIT"
+
+
+def test_entries_are_per_credentials_and_keep_view_headers(tmp_path):
+    app = make_app(make_engine(), SQLiteBackend(str(tmp_path / "responses.sqlite3")))
+    client = app.test_client()
+
+    ada = client.get("/me", headers={"Authorization": "Bearer ada"})
+    grace = client.get("/me", headers={"Authorization": "Bearer grace"})
+    assert grace.headers["X-Cache"] == "MISS"
+    assert grace.get_json()["data"] == "Bearer grace"
+
+    hit = client.get("/me", headers={"Authorization": "Bearer ada"})
+    assert hit.headers["X-Cache"] == "HIT"
+    assert hit.get_json()["data"] == "Bearer ada"
+    assert hit.headers["X-Total-Count"] == ada.headers["X-Total-Count"] == "1"
+    assert app.calls == [1, 1]
+
+
+def test_dropped_caches_are_forgotten():
+    gc.collect()
+    before = len(response_cache._caches)
+    cache = ResponseCache(backend=MemoryBackend())
+    assert len(response_cache._caches) == before + 1
+    del cache
+    gc.collect()
+    assert len(response_cache._caches) == before
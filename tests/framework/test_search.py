@@ -0,0 +1,127 @@
+import csv
+import os
+import random
+
+import pytest
+from sqlalchemy import Column, Integer, String, create_engine
+from sqlalchemy.orm import Session, declarative_base
+
+from framework.search import InvertedIndex
+
+FILES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../exercises/session_2/files"))
+
+SOURCES = {
+    "physical_data.csv": ["eye_color", "hair_color", "age", "height_cm", "weight_kg", "nationality"],
+    "studies_data.csv": ["degree", "institution"],
+    "hobbies_data.csv": ["hobby"],
+    "favorite_data.csv": ["food"],
+    "family_data.csv": [("family", "relation")],
+}
+
+
+def build_index():
+    index = InvertedIndex()
+    for file_name, attributes in SOURCES.items():
+        with open(os.path.join(FILES_DIR, file_name), newline="") as file:
+            for row in csv.DictReader(file):
+                for attribute in attributes:
+                    attribute, column = attribute if isinstance(attribute, tuple) else (attribute, attribute)
+                    index.add(int(row["person_id"]), attribute, row[column])
+    with open(os.path.join(FILES_DIR, "people_data.csv"), newline="") as file:
+        names = {int(row["id"]): row["full_name"] for row in csv.DictReader(file)}
+    return index, names
+
+
+@pytest.mark.parametrize(
+    "filters,expected",
+    [
+        (
+            {"eye_color": "hazel", "hair_color": "black", "degree": "PhD", "hobby": "dancing", "food": "lasagna", "family": "mother"},
+            {"Regina Fisher", "Emily Boyd"},
+        ),
+        (
+            {"eye_color": "green", "hair_color": "black", "degree": "Certificate", "hobby": "chess", "food": "salad", "family": "aunt"},
+            {"Dennis Mills", "Keith Jackson"},
+        ),
+        ({"eye_color": "blue", "hair_color": "brown", "nationality": "Mexican"}, {"Mark Sullivan"}),
+        ({"eye_color": "hazel", "hair_color": "black", "age": 39, "nationality": "Spanish"}, {"Regina Fisher"}),
+        ({"eye_color": "green", "hair_color": "brown", "age": 25}, {"Sarah Flores"}),
+    ],
+)
+def test_find_session_2_cases(filters, expected):
+    index, names = build_index()
+    assert {names[person_id] for person_id in index.find(filters)} == expected
+
+
+def test_unknown_filter_is_rejected():
+    index, _ = build_index()
+    with pytest.raises(ValueError):
+        index.find({"shoe_size": 42})
+
+
+Base = declarative_base()
+
+
+class Hobby(Base):
+    __tablename__ = "hobbies"
+    id = Column(Integer, primary_key=True)
+    person_id = Column(Integer)
+    hobby = Column(String)
+
+
+def test_tracked_model_updates_after_commit():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    index = InvertedIndex().track(Hobby, "hobby", "person_id", "hobby")
+    with Session(engine) as session:
+        hobby = Hobby(person_id=1, hobby="chess")
+        session.add(hobby)
+        session.flush()
+        assert index.find({"hobby": "chess"}) == set()
+        session.commit()
+        assert index.find({"hobby": "chess"}) == {1}
+
+        hobby.hobby = "dancing"
+        session.commit()
+        assert index.find({"hobby": "chess"}) == set()
+        assert index.find({"hobby": "dancing"}) == {1}
+
+        session.add(Hobby(person_id=2, hobby="dancing"))
+        session.rollback()
+        assert index.find({"hobby": "dancing"}) == {1}
+
+        session.delete(hobby)
+        session.commit()
+        assert index.find({"hobby": "dancing"}) == set()
+
+
+def test_duplicate_rows_keep_the_id_until_the_last_one_goes():
+    index = InvertedIndex(["family"])
+    index.add(1, "family", "brother")
+    index.add(1, "family", "Brother")
+    index.add(2, "family", "sister")
+    index.remove(1, "family", "brother")
+    assert index.find({"family": "brother"}) == {1}
+    assert index.count("family", "brother") == 1
+    index.remove(1, "family", "brother")
+    assert index.find({"family": "brother"}) == set()
+
+
+def test_sparse_and_dense_postings_match_a_scan():
+    # "rare" keeps ids below one in sixteen, so both intersection paths run.
+    rng = random.Random(3)
+    rows = {person_id: {"rare": rng.randrange(40), "common": rng.randrange(3), "half": rng.randrange(2)}
+            for person_id in range(1, 5001)}
+    index = InvertedIndex(["rare", "common", "half"])
+    for person_id, values in rows.items():
+        for attribute, value in values.items():
+            index.add(person_id, attribute, value)
+    for filters in ({"rare": 7, "common": 1}, {"common": 2, "half": 0}, {"rare": 3, "common": 0, "half": 1}):
+        expected = {person_id for person_id, values in rows.items()
+                    if all(values[attribute] == value for attribute, value in filters.items())}
+        ids = index.find_ids(filters)
+        assert ids.tolist() == sorted(expected)
+        assert index.find(filters) == expected
+    removed = ids.tolist()[0]
+    index.remove_item(removed)
+    assert removed not in index.find(filters)
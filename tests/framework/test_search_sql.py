@@ -0,0 +1,128 @@
+import csv
+import os
+
+import pytest
+from sqlalchemy import Column, ForeignKey, Index, Integer, MetaData, String, Table, create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from framework.search_sql import build_search, explain, search_indexes, seq_scanned_tables
+
+FILES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../exercises/session_2/files"))
+
+metadata = MetaData()
+people = Table("plan_people", metadata, Column("id", Integer, primary_key=True), Column("full_name", String))
+
+
+def child(name, *columns):
+    return Table(
+        name,
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("person_id", Integer, ForeignKey("plan_people.id")),
+        *columns,
+    )
+
+
+physical = child(
+    "plan_physical",
+    Column("eye_color", String),
+    Column("hair_color", String),
+    Column("age", Integer),
+    Column("height_cm", Integer),
+    Column("weight_kg", Integer),
+    Column("nationality", String),
+)
+studies = child("plan_studies", Column("degree", String), Column("institution", String))
+hobbies = child("plan_hobbies", Column("hobby", String))
+favorites = child("plan_favorites", Column("food", String))
+family = child("plan_family", Column("relation", String), Column("name", String))
+
+SOURCES = {
+    "eye_color": (physical, "person_id", "eye_color"),
+    "hair_color": (physical, "person_id", "hair_color"),
+    "age": (physical, "person_id", "age"),
+    "height_cm": (physical, "person_id", "height_cm"),
+    "weight_kg": (physical, "person_id", "weight_kg"),
+    "nationality": (physical, "person_id", "nationality"),
+    "degree": (studies, "person_id", "degree"),
+    "institution": (studies, "person_id", "institution"),
+    "hobby": (hobbies, "person_id", "hobby"),
+    "food": (favorites, "person_id", "food"),
+    "family": (family, "person_id", "relation"),
+}
+
+for name, table_name, columns in search_indexes(SOURCES):
+    Index(name, *(metadata.tables[table_name].c[column] for column in columns))
+
+CASES = [
+    ({"eye_color": "hazel", "hair_color": "black", "degree": "PhD", "hobby": "dancing", "food": "lasagna", "family": "mother"}, {"Regina Fisher", "Emily Boyd"}),
+    ({"eye_color": "green", "hair_color": "black", "degree": "Certificate", "hobby": "chess", "food": "salad", "family": "aunt"}, {"Dennis Mills", "Keith Jackson"}),
+    ({"eye_color": "blue", "hair_color": "brown", "nationality": "Mexican"}, {"Mark Sullivan"}),
+    ({"eye_color": "hazel", "hair_color": "black", "age": 39, "nationality": "Spanish"}, {"Regina Fisher"}),
+    ({"eye_color": "green", "hair_color": "brown", "age": 25}, {"Sarah Flores"}),
+]
+
+FILES = [
+    (people, "people_data.csv"),
+    (physical, "physical_data.csv"),
+    (studies, "studies_data.csv"),
+    (hobbies, "hobbies_data.csv"),
+    (favorites, "favorite_data.csv"),
+    (family, "family_data.csv"),
+]
+
+
+def load(conn):
+    metadata.create_all(conn)
+    for table, file_name in FILES:
+        with open(os.path.join(FILES_DIR, file_name), newline="") as file:
+            rows = [{key: value or None for key, value in row.items()} for row in csv.DictReader(file)]
+        conn.execute(table.insert(), rows)
+
+
+def test_filters_are_semi_joins():
+    sql = str(build_search(people, CASES[0][0], SOURCES, columns=[people.c.full_name]))
+    assert sql.count("EXISTS") == 6
+    assert "JOIN" not in sql
+
+
+@pytest.mark.parametrize("filters,expected", CASES)
+def test_search_cases_sqlite(filters, expected):
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        load(conn)
+        statement = build_search(people, filters, SOURCES, columns=[people.c.full_name])
+        assert set(conn.execute(statement).scalars()) == expected
+
+
+@pytest.fixture(scope="module")
+def postgres():
+    url = os.environ.get("SEARCH_PLAN_DATABASE_URL", "postgresql+psycopg://{}:{}@{}:{}/{}".format(
+        os.environ.get("POSTGRES_USER", "postgres"),
+        os.environ.get("POSTGRES_PASSWORD", "postgres"),
+        os.environ.get("POSTGRES_HOST", "localhost"),
+        os.environ.get("POSTGRES_PORT", "5432"),
+        os.environ.get("POSTGRES_DB", "postgres"),
+    ))
+    engine = create_engine(url)
+    try:
+        conn = engine.connect()
+    except OperationalError:
+        pytest.skip("Postgres is not reachable")
+    transaction = conn.begin()
+    load(conn)
+    conn.execute(text("ANALYZE"))
+    # The sample has a hundred people, where a sequential scan is always the
+    # cheapest plan. Pricing sequential scans out leaves them in the plan only
+    # when no index can answer the filter, which is what happens at 1M rows.
+    conn.execute(text("SET LOCAL enable_seqscan = off"))
+    yield conn
+    transaction.rollback()
+    conn.close()
+
+
+@pytest.mark.parametrize("filters,expected", CASES)
+def test_search_cases_use_indexes(postgres, filters, expected):
+    statement = build_search(people, filters, SOURCES, columns=[people.c.full_name])
+    assert seq_scanned_tables(explain(postgres, statement)) == []
+    assert set(postgres.execute(statement).scalars()) == expected
@@ -0,0 +1,33 @@
+
+from sqlalchemy import create_engine, func, select
+
+from framework.models import MotivationalPhrase, SeedLog
+from framework.seeding import seed
+
+
+def make_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'seeding.db'}")
+    MotivationalPhrase.__table__.create(engine)
+    SeedLog.__table__.create(engine)
+    return engine
+
+
+def phrases(engine):
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(MotivationalPhrase)).scalar()
+
+
+def test_seed_inserts_in_batches_once(tmp_path):
+    engine = make_engine(tmp_path)
+    rows = [{"phrase": f"phrase {i}"} for i in range(25)]
+    assert seed("phrases", MotivationalPhrase, rows, engine=engine, batch_size=10) == 25
+    assert seed("phrases", MotivationalPhrase, rows, engine=engine, batch_size=10) == 0
+    assert phrases(engine) == 25
+
+
+def test_changed_seed_skips_existing_rows(tmp_path):
+    engine = make_engine(tmp_path)
+    assert seed("phrases", MotivationalPhrase, [{"phrase": "one"}], engine=engine) == 1
+    changed = [{"phrase": "one"}, {"phrase": "two"}, {"phrase": "three"}]
+    assert seed("phrases", MotivationalPhrase, changed, engine=engine, batch_size=2) == 2
+    assert phrases(engine) == 3
@@ -0,0 +1,17 @@
+import sys
+
+from framework.server import Server, app_path, load_app, options
+
+
+def test_server_preloads_the_selected_app(monkeypatch):
+    # load_app registers the module as `main` and puts its folder on sys.path.
+    monkeypatch.delitem(sys.modules, "main", raising=False)
+    monkeypatch.setattr(sys, "path", list(sys.path))
+    app = load_app(app_path("capdevcr/health"))
+    assert app.test_client().get("/").get_json() == {"status": "ok"}
+
+    server = Server(app, dict(options(), workers=3, threads=2))
+    assert server.cfg.workers == 3
+    assert server.cfg.threads == 2
+    assert server.cfg.preload_app
+    assert server.load() is app
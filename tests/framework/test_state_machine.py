@@ -0,0 +1,88 @@
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, select
+from sqlalchemy.dialects import postgresql
+
+from framework.state_machine import StateMachine
+
+metadata = MetaData()
+shipments = Table(
+    "shipments",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("status", String),
+    Column("location", String),
+    Column("carrier_id", Integer),
+    Column("version", Integer, nullable=False, default=1),
+)
+
+TRANSITIONS = {"Created": {"In Transit"}, "In Transit": {"In Transit", "Delivered"}}
+machine = StateMachine(shipments, TRANSITIONS)
+
+
+@pytest.fixture
+def conn():
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(shipments.insert(), [
+            {"id": 1, "status": "Created", "carrier_id": 7},
+            {"id": 2, "status": "In Transit", "carrier_id": 7},
+            {"id": 3, "status": "Delivered", "carrier_id": 7},
+        ])
+        yield connection
+
+
+def test_transition_only_matches_expected_state(conn):
+    row = machine.transition(conn, 1, "In Transit", expected="Created")
+    assert (row.status, row.version) == ("In Transit", 2)
+    assert machine.transition(conn, 1, "In Transit", expected="Created") is None
+    assert machine.transition(conn, 3, "Delivered") is None
+    with pytest.raises(ValueError):
+        machine.transition(conn, 1, "Delivered", expected="Created")
+
+
+def test_version_check_rejects_lost_updates(conn):
+    assert machine.transition(conn, 2, "In Transit", version=1, values={"location": "A"}) is not None
+    assert machine.transition(conn, 2, "In Transit", version=1, values={"location": "B"}) is None
+    assert conn.execute(select(shipments.c.location)).scalars().all()[1] == "A"
+
+
+def test_batch_results_keep_item_order(conn):
+    results = machine.apply_batch(conn, [
+        {"id": 2, "to": "Delivered", "expected": "In Transit"},
+        {"id": 1, "to": "Delivered", "expected": "Created"},
+        {"id": 3, "to": "In Transit", "expected": "Created"},
+    ], where=[shipments.c.carrier_id == 7])
+    assert [result["ok"] for result in results] == [True, False, False]
+    assert results[0] == {"id": 2, "ok": True, "status": "Delivered", "version": 2}
+    assert "Cannot move" in results[1]["error"]
+    assert results[2]["error"] == "Conflict"
+
+
+def test_batch_rejects_repeated_ids(conn):
+    results = machine.apply_batch(conn, [
+        {"id": 2, "to": "In Transit", "expected": "In Transit"},
+        {"id": 2, "to": "Delivered", "expected": "In Transit"},
+    ])
+    assert [result["ok"] for result in results] == [True, False]
+    assert results[1]["error"] == "Duplicate id in batch"
+    assert conn.execute(select(shipments.c.status).where(shipments.c.id == 2)).scalar() == "In Transit"
+
+
+def test_postgres_batch_is_one_statement():
+    class Capture:
+        dialect = postgresql.dialect()
+
+        def execute(self, statement):
+            self.sql = str(statement.compile(dialect=self.dialect))
+            return []
+
+    capture = Capture()
+    machine._batch_update(capture, [
+        {"id": 1, "to": "In Transit", "expected": "Created", "version": 1, "values": {"location": "A"}},
+        {"id": 2, "to": "In Transit", "expected": "In Transit", "version": 4, "values": {"location": "B"}},
+    ], where=())
+    assert capture.sql.startswith("UPDATE shipments SET")
+    assert "FROM (VALUES" in capture.sql
+    assert "RETURNING" in capture.sql
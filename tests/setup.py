@@ -1,51 +1,20 @@
+import hashlib
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import shutil
+import socket
 import subprocess
 import re
 import sys
+import time
 from typing import List
-import threading
+import urllib.error
+import urllib.request
 
 
-main_process = None
-
-
-def copy_file(source_path, destination_path):
-    source_path = Path(source_path)
-    dest_path = Path(destination_path)
-
-    # Create parent directories
-    dest_path.parent.mkdir(parents=True, exist_ok=True)
-
-    # Copy the file
-    shutil.copy2(source_path, dest_path)
-
-    return dest_path
-
-
-def copy_directory(source, destination, ignore_patterns=None):
-    def ignore_function(directory, files):
-        ignored = []
-        if ignore_patterns:
-            for pattern in ignore_patterns:
-                ignored.extend([f for f in files if pattern in f])
-        return ignored
-
-    try:
-        if ignore_patterns:
-            result = shutil.copytree(
-                source, destination, ignore=ignore_function, dirs_exist_ok=True
-            )
-        else:
-            result = shutil.copytree(source, destination, dirs_exist_ok=True)
-
-        return result
-    except Exception as e:
-        print(f"Copy failed: {e}")
-
-
-def get_new_contributor_dir():
+def get_new_contributor_dirs():
     def extract_app_directory(file_path):
         pattern = r"backend/contributors/([A-Za-z0-9]+\/[A-Za-z0-9]+)/main.py"
         m = re.match(pattern=pattern, string=file_path)
@@ -73,158 +42,311 @@ def get_new_contributor_dir():
             if line.strip() and "contributors" in line
         }
 
-        directories.remove(None)
-        return directories.pop()
+        directories.discard(None)
+        return sorted(directories)
 
     except Exception as e:
         print(f"Error: {e}")
-        return None
+        return []
 
 
-def quick_venv_setup(folder_path, requirements_files: List[str] = [], dry_run=False):
-    venv_path = Path(folder_path)
+def get_new_contributor_dir():
+    """The app under test: APPLICATION_FOLDER when the harness set it, else the
+    first changed app."""
+    if os.environ.get("APPLICATION_FOLDER"):
+        return os.environ["APPLICATION_FOLDER"]
+    directories = get_new_contributor_dirs()
+    return directories[0] if directories else None
+
+
+VENV_CACHE_DIR = Path(
+    os.environ.get("HARNESS_CACHE_DIR", Path.home() / ".cache" / "python_react_bootcamp")
+).resolve() / "venvs"
+SYNC_IGNORE_PATTERNS = [".git", "__pycache__", ".pyc", ".venv"]
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def requirements_key(requirements_files: List[str]):
+    """Hash of the requirement files (in order) and the interpreter version."""
+    digest = hashlib.sha256(sys.version.encode("utf-8"))
+    for rq in requirements_files:
+        digest.update(Path(rq).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def quick_venv_setup(requirements_files: List[str] = [], dry_run=False):
+    """Python of a venv with `requirements_files` installed, built once per key.
+
+    Venvs live in VENV_CACHE_DIR (override with HARNESS_CACHE_DIR) under the
+    hash of the requirement files, so any change to them builds a new venv and
+    an unchanged set is reused as is. The `.complete` marker is written last,
+    an interrupted install is rebuilt on the next run.
+    """
+    venv_path = VENV_CACHE_DIR / requirements_key(requirements_files)
     python_exe = venv_path / ("Scripts/python.exe" if os.name == "nt" else "bin/python")
+    marker = venv_path / ".complete"
+    if marker.exists():
+        print(f"Using cached venv {venv_path}")
+        return str(python_exe)
     if dry_run:
-        return python_exe
+        print(f"Would build venv {venv_path}")
+        return str(python_exe)
+
+    started = time.perf_counter()
+    shutil.rmtree(venv_path, ignore_errors=True)
     subprocess.run([sys.executable, "-m", "venv", str(venv_path)], check=True)
     subprocess.run(
         [str(python_exe), "-m", "pip", "install", "--upgrade", "pip"], check=True
     )
-
     if requirements_files:
+        # One resolver run for every file instead of one install per file.
+        command = [str(python_exe), "-m", "pip", "install"]
         for rq in requirements_files:
-            subprocess.run(
-                [str(python_exe), "-m", "pip", "install", "-r", rq], check=True
-            )
-
+            command += ["-r", str(rq)]
+        subprocess.run(command, check=True)
+    marker.write_text("\n".join(str(rq) for rq in requirements_files))
+    print(f"Built venv {venv_path} in {time.perf_counter() - started:.1f} s")
     return str(python_exe)
 
 
-def replace_in_file(file_path, pattern, replacement):
-    try:
-        with open(file_path, "r") as file:
-            content = file.read()
-
-        updated_content = re.sub(pattern, replacement, content)
-
-        with open(file_path, "w") as file:
-            file.write(updated_content)
+def sync_tree(source, destination, ignore_patterns=SYNC_IGNORE_PATTERNS):
+    """Mirror `source` into `destination`, copying only what changed.
 
-    except Exception as e:
-        print(f"❌ Error updating file: {e}")
-        return False
+    A file is skipped when size and mtime match; when only the mtime differs
+    the contents are compared by hash before copying. Files that no longer
+    exist in `source` are removed. Returns the number of files copied.
+    """
+    source, destination = Path(source), Path(destination)
 
+    def ignored(name):
+        return any(pattern in name for pattern in ignore_patterns)
 
-def setup_env(dry_run: bool = False):
-    application_folder = get_new_contributor_dir()
-    app_requirements = "./tests/tmp/app/requirements.txt"
-    contributor_app_requirements = (
-        f"./tests/tmp/app/contributors/{application_folder}/requirements.txt"
-    )
-    if not dry_run:
-        try:
-            shutil.rmtree("./tests/tmp")
-        except FileNotFoundError:
-            print("path ./tests/tmp does not exists")
-        copy_file("./backend/requirements.txt", app_requirements)
-        copy_file(
-            f"./backend/contributors/{application_folder}/requirements.txt",
-            contributor_app_requirements,
-        )
-        copy_directory(
-            "./backend",
-            "./tests/tmp/app",
-            ignore_patterns=[".git", "__pycache__", ".pyc"],
-        )
-    python_exe = quick_venv_setup(
-        "./tests/tmp/app/.venv",
-        [app_requirements, contributor_app_requirements],
-        dry_run=dry_run,
-    )
-    local_db = "database.db"
-    db_replacement = f'DATABASE_URL = "sqlite:///{local_db}"'
-    pattern = r'DATABASE_URL\s*=\s*f?"postgresql\+psycopg://[^"]*"'
-    replace_in_file("./tests/tmp/app/framework/database.py", pattern, db_replacement.replace(local_db, "tests/tmp/database.db"))
-    replace_in_file(
-        "./tests/tmp/app/framework/scripts/reset_db.py", pattern, db_replacement
-    )
-    replace_in_file("./tests/tmp/app/framework/alembic/env.py", pattern, db_replacement)
-    return application_folder, python_exe
-
-
-def run(app_directory, python_exe):
-    os.environ["FLASK_APP"] = f"./tests/tmp/app/contributors/{app_directory}/main.py"
-    os.environ["FLASK_ENV"] = "development"
+    copied = 0
+    seen = set()
+    for directory, dirnames, filenames in os.walk(source):
+        dirnames[:] = [name for name in dirnames if not ignored(name)]
+        relative = Path(directory).relative_to(source)
+        (destination / relative).mkdir(parents=True, exist_ok=True)
+        seen.add(relative)
+        for name in filenames:
+            if ignored(name):
+                continue
+            seen.add(relative / name)
+            src, dst = Path(directory) / name, destination / relative / name
+            src_stat = src.stat()
+            if dst.exists():
+                dst_stat = dst.stat()
+                if dst_stat.st_size == src_stat.st_size:
+                    if dst_stat.st_mtime_ns == src_stat.st_mtime_ns:
+                        continue
+                    if file_digest(src) == file_digest(dst):
+                        shutil.copystat(src, dst)
+                        continue
+            shutil.copy2(src, dst)
+            copied += 1
+
+    for directory, dirnames, filenames in os.walk(destination, topdown=False):
+        relative = Path(directory).relative_to(destination)
+        if any(ignored(part) for part in relative.parts):
+            continue
+        for name in filenames:
+            if not ignored(name) and relative / name not in seen:
+                (Path(directory) / name).unlink()
+        if relative not in seen and not os.listdir(directory):
+            os.rmdir(directory)
+    return copied
+
+
+HARNESS_DIR = Path("./tests/tmp").resolve()
+APP_TREE = HARNESS_DIR / "app"
+READY_TIMEOUT = float(os.environ.get("HARNESS_READY_TIMEOUT", "60"))
+
+
+def app_slug(application_folder):
+    return application_folder.replace("/", "__")
+
+
+def app_requirements(application_folder):
+    return [
+        "./backend/requirements.txt",
+        f"./backend/contributors/{application_folder}/requirements.txt",
+    ]
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def app_database_url(application_folder, python_exe):
+    """A database nobody else uses: a SQLite file per app, or a Postgres
+    schema per app when HARNESS_DATABASE_URL points at Postgres."""
+    base_url = os.environ.get("HARNESS_DATABASE_URL", "")
+    if not base_url.startswith("postgresql"):
+        return f"sqlite:///{HARNESS_DIR / app_slug(application_folder) / 'database.db'}"
+    schema = f"test_{app_slug(application_folder)}".lower()
     subprocess.run(
         [
-            "./app/.venv/bin/alembic",
-            "-c",
-            "./app/framework/alembic.ini",
-            "upgrade",
-            "head",
+            python_exe, "-c",
+            "import sys; from sqlalchemy import create_engine, text; "
+            "engine = create_engine(sys.argv[1], isolation_level='AUTOCOMMIT'); "
+            "conn = engine.connect(); "
+            "conn.execute(text(f'DROP SCHEMA IF EXISTS {sys.argv[2]} CASCADE')); "
+            "conn.execute(text(f'CREATE SCHEMA {sys.argv[2]}'))",
+            base_url, schema,
         ],
         check=True,
-        cwd="./tests/tmp/",
     )
-    global main_process
-    main_process = subprocess.run([python_exe, os.environ.get("FLASK_APP")], check=True)
-
-
-def quick_kill_python_on_port(port=4000):
-    result = subprocess.run(
-        ["lsof", "-ti", f":{port}"], capture_output=True, text=True, check=True
+    separator = "&" if "?" in base_url else "?"
+    return f"{base_url}{separator}options=-csearch_path%3D{schema}"
+
+
+def setup_env(application_folder, python_exe, port):
+    """Environment for everything that runs for one app: migrations, seeds,
+    the server and its tests."""
+    workdir = HARNESS_DIR / app_slug(application_folder)
+    shutil.rmtree(workdir, ignore_errors=True)
+    workdir.mkdir(parents=True)
+    env = dict(os.environ)
+    env.update(
+        APPLICATION_FOLDER=application_folder,
+        # framework.settings reads DATABASE_URL before the POSTGRES_* variables.
+        DATABASE_URL=app_database_url(application_folder, python_exe),
+        PYTHONPATH=str(APP_TREE),
+        PATH=os.pathsep.join([str(Path(python_exe).parent), env.get("PATH", "")]),
+        API_URL=f"http://127.0.0.1:{port}",
+        FLASK_APP=str(APP_TREE / "contributors" / application_folder / "main.py"),
+        FLASK_ENV="development",
+        RESPONSE_CACHE_PATH=str(workdir / "response_cache.sqlite3"),
+        RESET_SNAPSHOT_DIR=str(HARNESS_DIR / "snapshots"),
     )
-    if result.stdout.strip():
-        pids = result.stdout.strip().split("\n")
-        print(f"🔍 Found {len(pids)} process(es) on port {port}: {pids}")
-        for pid in pids:
-            try:
-                subprocess.run(["kill", "-TERM", pid], check=True)
-                try:
-                    subprocess.run(["kill", "-0", pid], check=True, capture_output=True)
-                    subprocess.run(["kill", "-KILL", pid], check=True)
-                    print(f"⚠️  Force killed PID {pid}")
-                except subprocess.CalledProcessError:
-                    print(f"✅ PID {pid} terminated gracefully")
-            except subprocess.CalledProcessError:
-                print(f"❌ Could not process PID {pid}")
-                continue
-    else:
-        print(f"ℹ️  No processes found on port {port}")
-
-
-def setup():
-    app_directoy, python_exe = setup_env(dry_run=False)
-    run(app_directoy, python_exe)
-
-
-def teardown():
+    return workdir, env
+
+
+FRAMEWORK_TESTS = Path("./tests/framework")
+
+
+def test_paths(application_folder):
+    """What pytest runs against one app's server: TEST_FOLDER from the app's
+    test.env (as test.sh uses it), else `tests/<project>` when it exists, else
+    the HTTP exercise tests at the top of `tests`. The framework's unit tests
+    don't depend on the app and are never collected here."""
+    test_env = Path(f"./backend/contributors/{application_folder}/test.env")
+    if test_env.exists():
+        for line in test_env.read_text().splitlines():
+            name, _, value = line.partition("=")
+            if name.strip() == "TEST_FOLDER" and value.strip():
+                return [value.strip()]
+    project_tests = Path("./tests") / application_folder.split("/")[-1]
+    if project_tests.is_dir():
+        return [str(project_tests)]
+    return sorted(str(path) for path in Path("./tests").glob("test_*.py"))
+
+
+def wait_until_ready(url, process, timeout=READY_TIMEOUT):
+    """Poll `url` until the server answers at all (any HTTP status counts)."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with code {process.returncode}")
+        try:
+            urllib.request.urlopen(url, timeout=1)
+            return
+        except urllib.error.HTTPError:
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server not ready after {timeout:.0f} s")
+
+
+def stop(process):
+    if process is None or process.poll() is not None:
+        return
+    process.terminate()
+    try:
+        process.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def run_app(application_folder, python_exe):
+    """Migrate, seed, serve and test one app; returns its result."""
+    started = time.perf_counter()
+    port = free_port()
+    workdir, env = setup_env(application_folder, python_exe, port)
+    log_path = workdir / "server.log"
+    result = {"app": application_folder, "port": port, "log": str(log_path)}
+    process = None
     try:
-        print("Cleaning up Flask process...")
-        if main_process:
-            main_process.terminate()
-            try:
-                main_process.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                main_process.kill()
+        # SQLite databases are restored from a snapshot shared by every run with
+        # the same migrations and seeds; a Postgres schema is populated in place.
+        script = "reset_db.py" if env["DATABASE_URL"].startswith("sqlite") else "populate_database.py"
+        subprocess.run(
+            [python_exe, str(APP_TREE / "framework" / "scripts" / script)],
+            check=True, env=env, cwd=HARNESS_DIR, stdout=subprocess.DEVNULL,
+        )
+        with open(log_path, "w") as log:
+            process = subprocess.Popen(
+                [python_exe, "-m", "flask", "run", "--host", "127.0.0.1", "--port", str(port)],
+                env=env, cwd=HARNESS_DIR, stdout=log, stderr=subprocess.STDOUT,
+            )
+        wait_until_ready(env["API_URL"], process)
+        result["ready_s"] = round(time.perf_counter() - started, 2)
+        tests = subprocess.run(
+            [
+                str(Path(python_exe).parent / "pytest"), *test_paths(application_folder),
+                "-p", "no:cacheprovider", "--tb=short", f"--ignore={HARNESS_DIR}",
+                f"--ignore={FRAMEWORK_TESTS}",
+                f"--junitxml={workdir / 'report.xml'}",
+            ],
+            env=env, capture_output=True, text=True,
+        )
+        (workdir / "pytest.log").write_text(tests.stdout + tests.stderr)
+        counts = re.findall(r"^.*\d+ (?:passed|failed|errors?|skipped).*$", tests.stdout, re.M)
+        result["summary"] = counts[-1].strip("=! ") if counts else f"pytest exited with {tests.returncode}"
+        result["passed"] = tests.returncode == 0
+    except (RuntimeError, subprocess.CalledProcessError) as error:
+        result["summary"] = f"setup failed: {error}"
+        result["passed"] = False
     finally:
-        quick_kill_python_on_port(4000)
+        stop(process)
+    result["duration_s"] = round(time.perf_counter() - started, 2)
+    return result
+
+
+def run_all(application_folders, jobs=None):
+    """Test every app concurrently, each with its own port, database and server."""
+    started = time.perf_counter()
+    copied = sync_tree("./backend", APP_TREE)
+    print(f"Synced ./backend to {APP_TREE} ({copied} files copied)")
+    # Build (or reuse) each distinct venv once before anything runs in parallel.
+    pythons = {folder: quick_venv_setup(app_requirements(folder)) for folder in application_folders}
+    jobs = jobs or int(os.environ.get("HARNESS_JOBS", "0")) or len(application_folders)
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        results = list(executor.map(lambda folder: run_app(folder, pythons[folder]), application_folders))
+
+    report = {"duration_s": round(time.perf_counter() - started, 2), "apps": results}
+    (HARNESS_DIR / "report.json").write_text(json.dumps(report, indent=2))
+    print(f"\n{'app':<32} {'result':<6} {'time':>8}  summary")
+    for result in results:
+        status = "PASS" if result["passed"] else "FAIL"
+        print(f"{result['app']:<32} {status:<6} {result['duration_s']:>7.1f}s  {result['summary']}")
+    print(f"Total {report['duration_s']:.1f}s, report written to {HARNESS_DIR / 'report.json'}")
+    return all(result["passed"] for result in results)
 
 
 if __name__ == "__main__":
-    try:
-        thread = threading.Thread(target=setup, daemon=True)
-        thread.start()
-        thread.join(timeout=30)
-        print("Main Flask thread started")
-        try:
-            print("Running Python tests:")
-            subprocess.run(
-                ["./tests/tmp/app/.venv/bin/pytest", ".", "-vv", "-s", "--tb=short"],
-                check=True,
-            )
-        except Exception as pytest_exception:
-            f"pytest found exception {pytest_exception=}"
-    finally:
-        print("Tear down")
-        teardown()
+    folders = sys.argv[1:] or get_new_contributor_dirs()
+    if not folders:
+        print("No contributor apps changed, nothing to test.")
+        sys.exit(0)
+    sys.exit(0 if run_all(folders) else 1)
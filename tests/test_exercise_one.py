@@ -1,3 +1,4 @@
+import os
 import re
 
 import requests
@@ -40,7 +41,7 @@ def extract_detailed_flask_routes(included_path):
 
 def test_extract_routes():
     detailed_routes = extract_detailed_flask_routes("dnd")
-    base_url = "http://localhost:4000"
+    base_url = os.environ.get("API_URL", "http://localhost:4000")
     for route in detailed_routes:
         print(f"Path: {route['path']}, Methods: {route['methods']}")
         path = route["path"]